@@ -0,0 +1,140 @@
+import json
+import os
+import threading
+
+# Durable storage for the monitor channel history backfill: an append-only
+# JSON-lines archive of indexed events plus a checkpoint with the oldest
+# message id processed so far. A page is fsynced to the archive before the
+# checkpoint moves past it, so a crash at most re-indexes one page. Live
+# changes append newer records for an event, and deletes append a tombstone
+# ({"message_id": ..., "deleted": true}); the last record per event wins.
+# Only the byte offset of each event's latest record is kept in memory, so
+# archived events can be read back one at a time on demand.
+
+ARCHIVE_FILE = "events.jsonl"
+CHECKPOINT_FILE = "checkpoint.json"
+
+
+class BackfillStore:
+    def __init__(self, directory):
+        self.directory = directory
+        self.archive_path = os.path.join(directory, ARCHIVE_FILE)
+        self.checkpoint_path = os.path.join(directory, CHECKPOINT_FILE)
+        self.offsets = {}       # Message id -> byte offset of its latest record
+        self.newest_id = None   # Newest message id in the archive, set by scan()
+        self.superseded = 0     # Archive lines found overwritten or deleted
+        self._lock = threading.Lock()  # Backfill pages and live flushes write from executor threads
+
+    def load_checkpoint(self):
+        """Read {"before": message id or None, "done": bool, "indexed": int}"""
+        try:
+            with open(self.checkpoint_path) as checkpoint:
+                return json.load(checkpoint)
+        except (OSError, ValueError):
+            return {"before": None, "done": False, "indexed": 0}
+
+    def save_page(self, records, checkpoint):
+        """Append one page of event records, then advance the checkpoint atomically"""
+        self.append(records)
+        with self._lock:
+            tmp_path = self.checkpoint_path + ".tmp"
+            with open(tmp_path, "w") as tmp:
+                json.dump(checkpoint, tmp)
+                tmp.flush()
+                os.fsync(tmp.fileno())
+            os.replace(tmp_path, self.checkpoint_path)
+
+    def append(self, records):
+        """Durably append event records (or tombstones) to the archive"""
+        if not records:
+            return
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.archive_path, "ab") as archive:
+                if archive.tell() and not self._ends_with_newline():
+                    archive.write(b"\n")  # Seal a line torn by an earlier crash
+                for record in records:
+                    self._track(record, archive.tell())
+                    archive.write(json.dumps(record, ensure_ascii=False).encode() + b"\n")
+                archive.flush()
+                os.fsync(archive.fileno())
+
+    def scan(self):
+        """Index the archive's latest record offsets; returns {message id: start} of archived events"""
+        with self._lock:
+            self.offsets.clear()
+            starts = {}
+            lines = 0
+            try:
+                with open(self.archive_path, "rb") as archive:
+                    offset = 0
+                    for line in archive:
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            record = None  # Torn final line from a crash mid-append
+                        if record is not None:
+                            lines += 1
+                            self._track(record, offset)
+                            if record.get("deleted"):
+                                starts.pop(record["message_id"], None)
+                            else:
+                                starts[record["message_id"]] = record["start"]
+                        offset += len(line)
+            except OSError:
+                pass
+            self.superseded = lines - len(self.offsets)
+            return starts
+
+    def has(self, message_id):
+        return message_id in self.offsets
+
+    def read(self, message_id):
+        """Read one event's latest archived record, or None"""
+        with self._lock:
+            offset = self.offsets.get(message_id)
+            if offset is None:
+                return None
+            with open(self.archive_path, "rb") as archive:
+                archive.seek(offset)
+                return json.loads(archive.readline())
+
+    def compact(self):
+        """Rewrite the archive as just the latest record per live event"""
+        with self._lock:
+            tmp_path = self.archive_path + ".tmp"
+            offsets = {}
+            with open(self.archive_path, "rb") as archive, open(tmp_path, "wb") as tmp:
+                for message_id, offset in sorted(self.offsets.items(), key=lambda item: item[1]):
+                    archive.seek(offset)
+                    offsets[message_id] = tmp.tell()
+                    tmp.write(archive.readline())
+                tmp.flush()
+                os.fsync(tmp.fileno())
+            os.replace(tmp_path, self.archive_path)
+            self.offsets = offsets
+            self.superseded = 0
+
+    def _track(self, record, offset):
+        message_id = record["message_id"]
+        if record.get("deleted"):
+            self.offsets.pop(message_id, None)
+        else:
+            self.offsets[message_id] = offset
+        self.newest_id = max(self.newest_id or 0, message_id)
+
+    def _ends_with_newline(self):
+        with open(self.archive_path, "rb") as archive:
+            archive.seek(-1, os.SEEK_END)
+            return archive.read(1) == b"\n"
+
+    def reset(self):
+        """Forget all progress so the next run starts from the newest message"""
+        with self._lock:
+            self.offsets.clear()
+            self.newest_id = None
+            for path in (self.archive_path, self.checkpoint_path):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
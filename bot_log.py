@@ -0,0 +1,90 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+
+# Non-blocking structured logging: callers only enqueue a record, a
+# background listener thread formats it as JSON and writes to stdout, so a
+# backed-up log pipe never stalls the event loop.
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_SAMPLE_RATE = float(os.environ.get("LOG_SAMPLE_RATE", "0.1"))  # Kept share of sampled lines
+LOG_QUEUE_SIZE = 10000
+
+logger = logging.getLogger("react-bot")
+
+_FIELDS = ("message_id", "stage", "worker")
+_listener = None
+
+
+def fields(message_id=None, stage=None, sample=False, **extra):
+    """Build the `extra=` dict for a structured log line"""
+    extra.update(message_id=message_id, stage=stage, sample=sample)
+    return extra
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "msg": record.getMessage(),
+        }
+        for key in _FIELDS:
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = str(value) if key == "message_id" else value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class SampleFilter(logging.Filter):
+    """Keep only a share of the chattiest lines (those logged with sample=True)"""
+
+    def filter(self, record):
+        return not getattr(record, "sample", False) or random.random() < LOG_SAMPLE_RATE
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue raw records; drop instead of blocking when the queue is full"""
+
+    dropped = 0
+
+    def prepare(self, record):
+        # Formatting happens on the listener thread, not the caller's
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+
+def setup_logging():
+    """Route the bot logger through a background writer thread (idempotent)"""
+    global _listener
+    if _listener is not None:
+        return logger
+
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter())
+
+    handler = DroppingQueueHandler(log_queue)
+    handler.addFilter(SampleFilter())
+
+    logger.setLevel(LOG_LEVEL)
+    logger.addHandler(handler)
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, stream)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return logger
@@ -0,0 +1,234 @@
+import atexit
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from bot_log import fields, logger
+
+# Local audit trail of reaction changes. Each UTC day is one append-only
+# JSON-lines segment, gzip-compressed once the day is over. An index of the
+# days that mention each event and each user means a history lookup only
+# opens those segments. Callers only enqueue a change; a background writer
+# thread appends and indexes it, so disk I/O never stalls the event loop.
+
+INDEX_FILE = "index.json"
+SEGMENT_PREFIX = "changes-"
+
+
+def day_of(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d")
+
+
+class ChangeLog:
+    def __init__(self, directory):
+        self.directory = directory
+        self.index_path = os.path.join(directory, INDEX_FILE)
+        self.days_by_event = defaultdict(set)
+        self.days_by_user = defaultdict(set)
+        self.user_names = {}  # Lower-cased user name -> id, latest seen wins
+        self._sealed = set()
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._day = None
+        self._file = None
+        self._queue = queue.Queue()
+        self._writer = None
+
+    def record(self, message_id, user_id, user_name, emoji, action, ts=None):
+        """Queue one reaction change for the writer thread (never blocks)"""
+        ts = time.time() if ts is None else ts
+        self._queue.put_nowait({"ts": ts, "message_id": message_id, "user_id": user_id, "user": user_name, "emoji": emoji, "action": action})
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_loop, name="change-log-writer", daemon=True)
+            self._writer.start()
+            atexit.register(self.close)
+
+    def close(self):
+        """Write out everything queued so far and stop the writer"""
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join(timeout=5)
+            self._writer = None
+
+    def _write_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            try:
+                self._write([record for record in batch if record is not None])
+            except Exception as e:
+                # Whatever went wrong, the thread keeps draining the queue
+                logger.exception("Failed to write %d change(s): %s", len(batch), e, extra=fields(stage="change_log"))
+            if stop:
+                return
+
+    def _write(self, batch):
+        """Append a batch to its day's segment and index it, then seal any day it finished"""
+        with self._lock:
+            self._ensure_loaded()
+        # Only this thread touches the open segment, so appends need no lock
+        finished = set()
+        for record in batch:
+            day = day_of(record["ts"])
+            if day != self._day:
+                if self._day is not None:
+                    finished.add(self._day)
+                self._rotate(day)
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        if self._file is not None:
+            self._file.flush()
+        with self._lock:
+            for record in batch:
+                self._index(record, day_of(record["ts"]))
+        # Sealed days are skipped on load, so a day is only sealed once all of its records are indexed
+        # Compressed off the writer thread; reads fall back to the plain file meanwhile
+        for day in finished - {self._day}:
+            threading.Thread(target=self._seal_and_save, args=(day,), daemon=True).start()
+
+    def load(self):
+        """Read the index and scan unsealed segments now rather than on first use"""
+        with self._lock:
+            self._ensure_loaded()
+
+    def has_event(self, message_id):
+        with self._lock:
+            self._ensure_loaded()
+            return message_id in self.days_by_event
+
+    def user_named(self, name):
+        """Look up a user id by any name the log has seen them under"""
+        with self._lock:
+            self._ensure_loaded()
+            return self.user_names.get(name.lower())
+
+    def query(self, message_id=None, user_id=None, limit=25):
+        """Get the newest changes for an event or a user, reading only indexed days"""
+        with self._lock:
+            self._ensure_loaded()
+            if message_id is not None:
+                days = sorted(self.days_by_event.get(message_id, ()), reverse=True)
+            else:
+                days = sorted(self.days_by_user.get(user_id, ()), reverse=True)
+
+        found = []
+        for day in days:
+            matches = [
+                record for record in self._read(day)
+                if (record["message_id"] == message_id if message_id is not None else record["user_id"] == user_id)
+            ]
+            found.extend(reversed(matches))
+            if len(found) >= limit:
+                break
+        return found[:limit]
+
+    def _path(self, day, compressed):
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{day}.jsonl" + (".gz" if compressed else ""))
+
+    def _segments(self):
+        """List (day, compressed) for every segment on disk, oldest first"""
+        segments = []
+        for name in os.listdir(self.directory):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith((".jsonl", ".jsonl.gz")):
+                segments.append((name[len(SEGMENT_PREFIX):].split(".", 1)[0], name.endswith(".gz")))
+        return sorted(segments)
+
+    def _read(self, day):
+        """Yield a day's records from its compressed or still-open segment"""
+        path = self._path(day, compressed=True)
+        opener = gzip.open
+        if not os.path.exists(path):
+            path = self._path(day, compressed=False)
+            opener = open
+        try:
+            with opener(path, "rt", encoding="utf-8") as segment:
+                for line in segment:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue  # Torn final line from a crash mid-append
+        except OSError:
+            return
+
+    def _index(self, record, day):
+        self.days_by_event[record["message_id"]].add(day)
+        if record["user_id"] is not None:
+            self.days_by_user[record["user_id"]].add(day)
+            self.user_names[record["user"].lower()] = record["user_id"]
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        try:
+            with open(self.index_path) as index:
+                data = json.load(index)
+            self._sealed.update(data["sealed"])
+            for key, days in data["events"].items():
+                self.days_by_event[int(key)].update(days)
+            for key, days in data["users"].items():
+                self.days_by_user[int(key)].update(days)
+            self.user_names.update(data.get("names", {}))
+        except (OSError, ValueError, KeyError):
+            pass
+
+        # Anything the saved index does not cover is scanned: today's open
+        # segment, and any day a crash left unsealed or unindexed
+        today = day_of(time.time())
+        for day, compressed in self._segments():
+            if day in self._sealed and compressed:
+                continue
+            for record in self._read(day):
+                self._index(record, day)
+            if day != today:
+                self._seal(day)
+        self._save_index()
+        self._loaded = True
+
+    def _rotate(self, day):
+        if self._file is not None:
+            self._file.close()
+        self._day = day
+        self._file = open(self._path(day, compressed=False), "a", encoding="utf-8")
+
+    def _seal_and_save(self, day):
+        self._compress(day)  # Nothing appends to a past day, so no lock is needed
+        with self._lock:
+            self._sealed.add(day)
+            self._save_index()
+
+    def _seal(self, day):
+        """Compress a finished day's segment and mark it as covered by the index"""
+        self._compress(day)
+        self._sealed.add(day)
+
+    def _compress(self, day):
+        plain = self._path(day, compressed=False)
+        if os.path.exists(plain):
+            tmp_path = self._path(day, compressed=True) + ".tmp"
+            with open(plain, "rb") as source, gzip.open(tmp_path, "wb") as target:
+                while chunk := source.read(1 << 20):
+                    target.write(chunk)
+            os.replace(tmp_path, self._path(day, compressed=True))
+            os.remove(plain)
+
+    def _save_index(self):
+        data = {
+            "sealed": sorted(self._sealed),
+            "events": {str(key): sorted(days) for key, days in self.days_by_event.items()},
+            "users": {str(key): sorted(days) for key, days in self.days_by_user.items()},
+            "names": self.user_names,
+        }
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w") as index:
+            json.dump(data, index)
+        os.replace(tmp_path, self.index_path)
@@ -0,0 +1,566 @@
+import time
+import discord
+from discord.ext import commands
+import keep_alive as web
+import state
+from bot_log import fields, logger
+from config import (
+    BOT_PROFILE, EXTENSIONS, HISTORY_LIMIT, LOG_CHANNEL_ID, MONITOR_CHANNEL_ID, SHADOW_FETCH_RATE,
+    SHADOW_SAMPLE_RATE, WORKER_PROCESSES,
+)
+from state import (
+    backfill_store, board_fingerprints, board_log, board_messages, bot, change_log, event_activity, event_meta,
+    event_starts, historical_events, member_resolver, member_roles, reaction_counts, reaction_signups,
+    reminder_generations, reminder_heap, shadow_stats, summary_fingerprints, summary_messages, summary_threads,
+    user_ids,
+)
+from cogs.tracking import (
+    EMOJI_MAP, clear_all_reactions, event_reactions, extract_title_and_timestamp, has_reactions, remember_event,
+)
+from cogs.render import build_export_text, bulk_rerender, publish_state, send_export
+from cogs.gateway import backfill_loop, restore_archived, sync_recent_reactions
+
+# Basic test commands
+@commands.command(name="ping")
+async def ping(ctx):
+    """Simple test command"""
+    await ctx.send("🏓 Pong! Bot is responding.")
+
+@commands.command(name="version")
+async def version_check(ctx):
+    """Check discord.py version"""
+    try:
+        version = discord.__version__
+        embed = discord.Embed(title="Version Info", color=0x00FF00)
+        embed.add_field(name="Discord.py Version", value=version, inline=False)
+        
+        # Test UI availability
+        try:
+            discord.ui.View()
+            ui_status = "✅ Available"
+        except:
+            ui_status = "❌ Not Available"
+        
+        embed.add_field(name="UI Components", value=ui_status, inline=False)
+        await ctx.send(embed=embed)
+        
+    except Exception as e:
+        await ctx.send(f"Version check error: {e}")
+
+@commands.command(name="button_test")
+async def button_test(ctx):
+    """Test if buttons work at all"""
+    try:
+        logger.debug("Creating simple button test...", extra=fields(stage="command"))
+        
+        view = discord.ui.View(timeout=60)
+        
+        button = discord.ui.Button(
+            label="Test Button", 
+            style=discord.ButtonStyle.primary,
+            custom_id="test_button_simple"
+        )
+        
+        view.add_item(button)
+        
+        await ctx.send("🔘 **Button Test** - Click the button below:", view=view)
+        logger.debug("Button test sent!", extra=fields(stage="command"))
+        
+    except Exception as e:
+        logger.error("Button test error: %s", e, extra=fields(stage="command"))
+        await ctx.send(f"❌ Button test failed: {e}")
+
+# Core commands
+@commands.command(name="sync_reactions")
+async def manual_sync_reactions(ctx, limit: int = 10):
+    """Manually sync reactions from recent messages"""
+    if ctx.channel.id != LOG_CHANNEL_ID:
+        await ctx.send("This command can only be used in the log channel.")
+        return
+    
+    await ctx.send(f"🔄 Syncing reactions from last {limit} messages...")
+    await sync_recent_reactions(limit)
+    await ctx.send("✅ Reaction sync completed! Check for buttons on summaries.")
+
+@commands.command(name="test_status")
+async def test_status(ctx):
+    """Show current bot status"""
+    embed = discord.Embed(title="🧪 Bot Test Status", color=0x00FFFF)
+    
+    total_messages = len(set(reaction_signups) | set(reaction_counts))
+    total_reactions = sum(len(emojis) for emojis in reaction_signups.values())
+    total_reactions += sum(len(emojis) for emojis in reaction_counts.values())
+    
+    embed.add_field(
+        name="📊 Data Status",
+        value=f"Tracking {total_messages} messages\nWith {total_reactions} different reactions",
+        inline=False
+    )
+    
+    embed.add_field(
+        name="📋 Summary Status",
+        value=f"Active summaries: {len(summary_messages)}\nActive threads: {len(summary_threads)}",
+        inline=False
+    )
+    
+    embed.add_field(
+        name="🎯 Channel Config",
+        value=f"Monitor: <#{MONITOR_CHANNEL_ID}>\nLogs: <#{LOG_CHANNEL_ID}>",
+        inline=False
+    )
+    
+    await ctx.send(embed=embed)
+
+@commands.command(name="memory_stats")
+async def memory_stats(ctx):
+    """Show process memory and cache sizes (compare BOT_PROFILE=lean vs default)"""
+    rss_kb = None
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    rss_kb = int(line.split()[1])
+                    break
+    except OSError:
+        import resource
+        rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    
+    embed = discord.Embed(title="🧠 Memory Footprint", color=0x00FFFF)
+    embed.add_field(
+        name="Process",
+        value=f"Profile: `{BOT_PROFILE}`\nRSS: {rss_kb / 1024:.1f} MiB" if rss_kb else f"Profile: `{BOT_PROFILE}`",
+        inline=False
+    )
+    embed.add_field(
+        name="discord.py caches",
+        value=(
+            f"Messages: {len(bot.cached_messages)}\n"
+            f"Members: {sum(len(guild.members) for guild in bot.guilds)}\n"
+            f"Users: {len(bot.users)}"
+        ),
+        inline=False
+    )
+    embed.add_field(
+        name="Bot state",
+        value=(
+            f"Events: {len(event_meta)}\n"
+            f"Roster names: {sum(len(users) for emojis in reaction_signups.values() for users in emojis.values())}\n"
+            f"Role index: {len(member_roles)}\n"
+            f"Resolver cache: {len(member_resolver)}"
+        ),
+        inline=False
+    )
+    await ctx.send(embed=embed)
+
+@commands.command(name="shadow_stats")
+async def shadow_status(ctx):
+    """Show shadow verification checks and mismatches"""
+    if not SHADOW_SAMPLE_RATE:
+        await ctx.send("Shadow verification is off. Set `SHADOW_SAMPLE_RATE` to enable it.")
+        return
+    
+    embed = discord.Embed(title="🔍 Shadow Verification", color=0x00FFFF)
+    embed.add_field(
+        name="Sampling",
+        value=f"Renders checked: {SHADOW_SAMPLE_RATE:.1%}\nOf those, re-fetched: {SHADOW_FETCH_RATE:.1%}",
+        inline=False
+    )
+    embed.add_field(
+        name="Rebuild checks",
+        value=f"Checked: {shadow_stats['checked']}\nEvents with drift: {shadow_stats['mismatched_events']}",
+        inline=False
+    )
+    components = ", ".join(
+        f"{key[len('mismatch_'):]}: {count}" for key, count in sorted(shadow_stats.items())
+        if key.startswith("mismatch_") and key != "mismatch_fetch"
+    )
+    if components:
+        embed.add_field(name="Drift by component", value=components, inline=False)
+    embed.add_field(
+        name="Fetch checks",
+        value=f"Checked: {shadow_stats['fetch_checked']}\nDisagreed with Discord: {shadow_stats['mismatch_fetch']}",
+        inline=False
+    )
+    if WORKER_PROCESSES:
+        embed.set_footer(text="Renders run in worker processes: see their stage=shadow log lines")
+    await ctx.send(embed=embed)
+
+@commands.command(name="show_emoji_map")
+async def show_emoji_map(ctx):
+    """Display the current EMOJI_MAP configuration"""
+    embed = discord.Embed(title="🗺️ Current Emoji Map Configuration", color=0x00FFFF)
+    
+    if not EMOJI_MAP:
+        embed.description = "No emojis configured in EMOJI_MAP"
+        await ctx.send(embed=embed)
+        return
+    
+    for emoji_id, (clean_name, color) in EMOJI_MAP.items():
+        try:
+            guild_emoji = discord.utils.get(ctx.guild.emojis, id=emoji_id)
+            if guild_emoji:
+                emoji_display = str(guild_emoji)
+                status = "✅ Found in server"
+            else:
+                emoji_display = f"<:unknown:{emoji_id}>"
+                status = "❌ Not found in server"
+        except:
+            emoji_display = f"<:unknown:{emoji_id}>"
+            status = "❌ Error"
+        
+        embed.add_field(
+            name=f"ID: {emoji_id}",
+            value=f"**Emoji:** {emoji_display}\n**Label:** {clean_name}\n**Status:** {status}",
+            inline=True
+        )
+    
+    embed.add_field(
+        name="Unicode Emojis",
+        value="⏳ Late\n🚫 Not attending (❌, :cross:)",
+        inline=False
+    )
+    
+    await ctx.send(embed=embed)
+
+@commands.command(name="debug_reactions")
+async def debug_reactions(ctx, message_id: int):
+    """Debug command to see current reaction data for a message"""
+    await restore_archived(message_id)
+    if has_reactions(message_id):
+        embed = discord.Embed(title=f"Debug: Reaction Data for {message_id}", color=0x00FFFF)
+        for emoji_key, users, count in event_reactions(message_id):
+            embed.add_field(
+                name=f"Emoji: {emoji_key}",
+                value=f"Users: {', '.join(users)}" if users else f"Count only: {count}",
+                inline=False
+            )
+        await ctx.send(embed=embed)
+    else:
+        await ctx.send(f"No reaction data found for message {message_id}")
+
+@commands.command(name="refresh_summary")
+async def refresh_summary(ctx, message_id: int):
+    """Manually refresh a summary for a specific message"""
+    if ctx.channel.id != LOG_CHANNEL_ID:
+        await ctx.send("This command can only be used in the log channel.")
+        return
+    
+    try:
+        monitor_channel = bot.get_channel(MONITOR_CHANNEL_ID)
+        message = await monitor_channel.fetch_message(message_id)
+        await restore_archived(message_id)
+        title, _ = remember_event(message_id, message.content)
+        
+        # Through publish_state, so in worker mode the owning worker renders it
+        await publish_state(message_id)
+        await ctx.send(f"✅ Refreshed summary for: {title} (with buttons!)")
+    except Exception as e:
+        await ctx.send(f"❌ Error refreshing summary: {e}")
+
+@commands.command(name="export_attendance")
+async def export_attendance(ctx, message_id: int):
+    """Export attendance list including not attending users"""
+    try:
+        monitor_channel = bot.get_channel(MONITOR_CHANNEL_ID)
+        message = await monitor_channel.fetch_message(message_id)
+        title, timestamp_str = extract_title_and_timestamp(message.content)
+        await restore_archived(message_id)
+        
+        if not has_reactions(message_id):
+            await ctx.send("❌ No reaction data found for this message.")
+            return
+        
+        if state.worker_pool:
+            state.worker_pool.submit_any({
+                "op": "export",
+                "message_id": message_id,
+                "channel_id": ctx.channel.id,
+                "author": message.author.name,
+                "title": title,
+                "timestamp": timestamp_str,
+            })
+            return
+        
+        export_text = build_export_text(message_id, title, timestamp_str, message.author.name)
+        await send_export(ctx, export_text, title)
+            
+    except Exception as e:
+        await ctx.send(f"❌ Error exporting attendance: {e}")
+
+@commands.command(name="clear_all_logs")
+async def clear_all_logs(ctx, confirm: str = None):
+    """Delete all messages in the log channel (for testing)"""
+    if ctx.channel.id != LOG_CHANNEL_ID:
+        await ctx.send("This command can only be used in the log channel.")
+        return
+    
+    if confirm != "CONFIRM":
+        await ctx.send("⚠️ **WARNING**: This will delete ALL messages in this channel!\n"
+                      "To confirm, use: `!clear_all_logs CONFIRM`")
+        return
+    
+    try:
+        await ctx.send("🗑️ Starting to clear all logs...")
+        
+        # Clear bot's cache first
+        summary_messages.clear()
+        summary_fingerprints.clear()
+        
+        deleted_count = 0
+        
+        # Delete messages in batches (Discord has limits)
+        async for message in ctx.channel.history(limit=None):
+            try:
+                await message.delete()
+                deleted_count += 1
+                
+                # Add small delay to avoid rate limits
+                if deleted_count % 10 == 0:
+                    await ctx.send(f"Deleted {deleted_count} messages...", delete_after=3)
+                    
+            except discord.NotFound:
+                # Message already deleted
+                pass
+            except discord.Forbidden:
+                await ctx.send(f"❌ Permission denied deleting message {message.id}")
+                break
+            except Exception as e:
+                logger.warning("Error deleting message: %s", e, extra=fields(message_id=message.id, stage="cleanup"))
+        
+        # Send final confirmation (this will be the only message left)
+        await ctx.send(f"✅ Cleared {deleted_count} messages from log channel!")
+        
+    except Exception as e:
+        await ctx.send(f"❌ Error clearing logs: {e}")
+
+@commands.command(name="clear_all_threads")
+async def clear_all_threads(ctx, confirm: str = None):
+    """Delete all threads in the log channel (for testing)"""
+    if ctx.channel.id != LOG_CHANNEL_ID:
+        await ctx.send("This command can only be used in the log channel.")
+        return
+    
+    if confirm != "CONFIRM":
+        await ctx.send("⚠️ **WARNING**: This will delete ALL threads in this channel!\n"
+                      "To confirm, use: `!clear_all_threads CONFIRM`")
+        return
+    
+    try:
+        await ctx.send("🧵 Starting to clear all threads...")
+        
+        # Clear bot's cache first
+        summary_threads.clear()
+        
+        deleted_count = 0
+        
+        # Get all threads (active and archived)
+        active_threads = ctx.channel.threads
+        
+        # Also get archived threads
+        archived_threads = []
+        async for thread in ctx.channel.archived_threads(limit=None):
+            archived_threads.append(thread)
+        
+        all_threads = active_threads + archived_threads
+        
+        for thread in all_threads:
+            try:
+                await thread.delete()
+                deleted_count += 1
+                logger.info("Deleted thread: %s", thread.name, extra=fields(stage="cleanup"))
+                
+            except discord.NotFound:
+                # Thread already deleted
+                pass
+            except discord.Forbidden:
+                await ctx.send(f"❌ Permission denied deleting thread {thread.name}")
+            except Exception as e:
+                logger.warning("Error deleting thread %s: %s", thread.name, e, extra=fields(stage="cleanup"))
+        
+        await ctx.send(f"✅ Cleared {deleted_count} threads from log channel!")
+        
+    except Exception as e:
+        await ctx.send(f"❌ Error clearing threads: {e}")
+
+@commands.command(name="clear_all_data")
+async def clear_all_data(ctx, confirm: str = None):
+    """Clear all bot data, logs, and threads (nuclear option for testing)"""
+    if ctx.channel.id != LOG_CHANNEL_ID:
+        await ctx.send("This command can only be used in the log channel.")
+        return
+    
+    if confirm != "NUCLEAR":
+        await ctx.send("⚠️ **NUCLEAR WARNING**: This will:\n"
+                      "• Delete ALL messages in this channel\n"
+                      "• Delete ALL threads in this channel\n"
+                      "• Clear ALL bot reaction data\n"
+                      "To confirm, use: `!clear_all_data NUCLEAR`")
+        return
+    
+    try:
+        await ctx.send("💥 NUCLEAR CLEANUP INITIATED...")
+        
+        # Clear all bot data
+        clear_all_reactions()
+        summary_messages.clear()
+        summary_threads.clear()
+        summary_fingerprints.clear()
+        event_meta.clear()
+        event_starts.clear()
+        event_activity.clear()
+        reminder_heap.clear()
+        reminder_generations.clear()
+        historical_events.clear()
+        board_messages.clear()
+        board_fingerprints.clear()
+        board_log.clear()
+        for message_id in list(web.attendance):
+            web.drop_event(message_id)
+        
+        # Clear threads first
+        await clear_all_threads(ctx, "CONFIRM")
+        
+        # Then clear messages
+        await clear_all_logs(ctx, "CONFIRM")
+        
+        # Final message
+        await ctx.send("💥 **NUCLEAR CLEANUP COMPLETE!**\n"
+                      "All data, logs, and threads have been cleared.\n"
+                      "Ready for fresh testing!")
+        
+    except Exception as e:
+        await ctx.send(f"❌ Error during nuclear cleanup: {e}")
+
+@commands.command(name="backfill")
+async def backfill_status(ctx, action: str = "status"):
+    """Show history backfill progress, or restart it from the newest message"""
+    if ctx.channel.id != LOG_CHANNEL_ID:
+        await ctx.send("This command can only be used in the log channel.")
+        return
+    
+    if action == "restart":
+        if state.backfill_task is not None:
+            state.backfill_task.cancel()
+        backfill_store.reset()
+        state.backfill_task = bot.loop.create_task(backfill_loop())
+        await ctx.send("🔄 History backfill restarted from the newest message.")
+        return
+    
+    checkpoint = backfill_store.load_checkpoint()
+    if checkpoint["done"]:
+        status = "complete"
+    elif state.backfill_task is not None and not state.backfill_task.done():
+        status = f"running (next page before message {checkpoint['before']})" if checkpoint["before"] else "running"
+    else:
+        status = "not running"
+    await ctx.send(
+        f"📚 History backfill {status}: {checkpoint['indexed']} event(s) archived, "
+        f"{len(historical_events)} historical event(s) in memory, {len(backfill_store.offsets)} on disk"
+    )
+
+@commands.command(name="history")
+async def change_history(ctx, *, target: str):
+    """Show recent reaction changes for a user (mention, id or name) or an event message id"""
+    raw_id = target.strip("<@!>")
+    known_id = user_ids.get(target)
+    
+    def lookup():
+        # Runs off the loop: the log's index lock may be held by its writer
+        message_id = user_id = None
+        if raw_id.isdigit():
+            # Message and user ids are both snowflakes: a bare id is an event if the log indexes it as one
+            if not target.startswith("<@") and change_log.has_event(int(raw_id)):
+                message_id = int(raw_id)
+            else:
+                user_id = int(raw_id)
+        else:
+            # Names seen before the last restart are only known to the log
+            user_id = known_id or change_log.user_named(target)
+        if message_id is None and user_id is None:
+            return None, None
+        return message_id, change_log.query(message_id=message_id, user_id=user_id, limit=HISTORY_LIMIT)
+    
+    message_id, records = await bot.loop.run_in_executor(None, lookup)
+    if records is None:
+        await ctx.send(f"No tracked user or event matches `{target}`.")
+        return
+    if not records:
+        await ctx.send(f"No recorded reaction changes for `{target}`.")
+        return
+    
+    if message_id is not None:
+        title = event_meta.get(message_id, (str(message_id), ""))[0]
+        lines = [f"📜 **Last {len(records)} change(s) on {title}**"]
+        lines += [f"<t:{int(record['ts'])}:f> {record['user']} {record['action']} {record['emoji']}" for record in records]
+    else:
+        lines = [f"📜 **Last {len(records)} change(s) by {records[0]['user']}**"]
+        for record in records:
+            title = event_meta.get(record["message_id"], (str(record["message_id"]), ""))[0]
+            lines.append(f"<t:{int(record['ts'])}:f> {record['action']} {record['emoji']} on {title}")
+    
+    chunks = [""]
+    for line in lines:
+        if len(chunks[-1]) + len(line) + 1 > 2000:
+            chunks.append("")
+        chunks[-1] += line + "\n"
+    for chunk in chunks:
+        await ctx.send(chunk)
+
+@commands.command(name="add_buttons_to_all")
+async def add_buttons_to_all(ctx):
+    """Add buttons to all existing summary messages"""
+    if not summary_messages:
+        await ctx.send("❌ No summary messages found in memory.")
+        return
+        
+    # Snapshot the targets: live handlers may add summaries while we render
+    await bulk_rerender(ctx, list(summary_messages))
+
+@commands.command(name="refresh_all")
+async def refresh_all(ctx):
+    """Re-render the summaries of every tracked event"""
+    if ctx.channel.id != LOG_CHANNEL_ID:
+        await ctx.send("This command can only be used in the log channel.")
+        return
+    
+    # Archived history is indexed for commands, not given summaries
+    targets = [message_id for message_id in event_meta if message_id not in historical_events]
+    if not targets:
+        await ctx.send("❌ No tracked events found in memory.")
+        return
+    
+    await bulk_rerender(ctx, targets)
+
+
+@commands.command(name="reload")
+async def reload_extensions(ctx, name: str = None):
+    """Reload an extension and every one loaded after it (all of them by default)"""
+    if ctx.channel.id != LOG_CHANNEL_ID:
+        await ctx.send("This command can only be used in the log channel.")
+        return
+    
+    targets = list(EXTENSIONS)
+    if name:
+        extension = name if name.startswith("cogs.") else f"cogs.{name}"
+        if extension not in EXTENSIONS:
+            await ctx.send(f"❌ Unknown extension `{name}`. Loaded: {', '.join(EXTENSIONS)}")
+            return
+        # Later extensions import from this one, so they are reloaded too
+        targets = targets[targets.index(extension):]
+    
+    started = time.perf_counter()
+    for extension in targets:
+        try:
+            await ctx.bot.reload_extension(extension)
+        except commands.ExtensionError as e:
+            logger.exception("Reload failed: %s", e, extra=fields(stage="reload"))
+            await ctx.send(f"❌ Reloading `{extension}` failed, it keeps its previous code: {e}")
+            return
+    
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    logger.info("Reloaded %s in %.1f ms", ", ".join(targets), elapsed_ms, extra=fields(stage="reload"))
+    await ctx.send(f"♻️ Reloaded {', '.join(f'`{extension}`' for extension in targets)} in {elapsed_ms:.0f} ms")
+
+async def setup(bot):
+    for command in [value for value in globals().values() if isinstance(value, commands.Command)]:
+        bot.add_command(command)
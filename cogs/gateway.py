@@ -0,0 +1,805 @@
+import asyncio
+import heapq
+import time
+import discord
+import keep_alive as web
+import state
+from bot_log import fields, logger
+from config import (
+    ARCHIVE_FLUSH_SECONDS, BACKFILL_PACING_SECONDS, BACKFILL_PAGE_SIZE, LOG_CHANNEL_ID, MONITOR_CHANNEL_ID,
+    RECONCILE_ACTIVE_SECONDS, RECONCILE_MAX_SECONDS, RECONCILE_MIN_SECONDS, RECONCILE_PACING_SECONDS,
+    REMINDER_CHANNEL_ID, REMINDER_OFFSETS, SUMMARY_MODE, THREAD_LOG_MODE, WORKER_PROCESSES,
+)
+from state import (
+    archive_dirty, archived_threads, attending_refs, backfill_store, board_log, bot, change_log, digest_pending,
+    event_activity, event_meta, event_role_counts, event_starts, historical_events, member_resolver,
+    member_roles, reaction_bot_counts, reaction_counts, reaction_signups, reconcile_wakeup,
+    reminder_generations, reminder_heap, reminder_wakeup, role_names, summary_fingerprints, summary_messages,
+    summary_threads, user_ids,
+)
+from workers import WorkerPool
+from cogs.tracking import (
+    breakdown_roles, build_member_index, clear_all_reactions, clear_reactions, event_reactions, has_reactions,
+    is_breakdown_role, load_reaction, reaction_drifted, reaction_kind, rebuild_attendance, rebuild_reminders,
+    record_reaction, remember_event, update_member_roles,
+)
+from cogs.render import (
+    board_loop, digest_loop, log_line, mark_summary_deleted, post_or_edit_summary, publish_api_event,
+    publish_state, request_board_update, send_thread_lines,
+)
+
+# Gateway listeners and the background loops: startup sync, live reaction
+# deltas, member role index, reminders, history backfill and reconciler.
+
+async def on_ready():
+    logger.info("%s has connected to Discord!", bot.user, extra=fields(stage="startup"))
+    logger.info("Discord.py version: %s", discord.__version__, extra=fields(stage="startup"))
+    
+    # Check if UI is available
+    try:
+        test_view = discord.ui.View()
+        logger.info("✅ Discord UI components are available!", extra=fields(stage="startup"))
+    except AttributeError as e:
+        logger.error("❌ Discord UI components not available: %s", e, extra=fields(stage="startup"))
+    
+    if WORKER_PROCESSES > 0 and state.worker_pool is None:
+        start_worker_pool()
+    
+    # Index the change log off the loop before live changes start appending
+    await bot.loop.run_in_executor(None, change_log.load)
+    await sync_recent_reactions()
+    start_background_tasks()
+
+async def on_resumed():
+    # Events may have been missed while the gateway was away
+    reconcile_wakeup.set()
+
+def start_background_tasks():
+    """Start the reconciler, backfill, archive, reminder, board and digest loops unless already running"""
+    if state.reconcile_task is None:
+        state.reconcile_task = bot.loop.create_task(reconcile_loop())
+    if state.backfill_task is None:
+        state.backfill_task = bot.loop.create_task(backfill_loop())
+    if state.archive_task is None:
+        state.archive_task = bot.loop.create_task(archive_loop())
+    if state.reminder_task is None and REMINDER_OFFSETS:
+        state.reminder_task = bot.loop.create_task(reminder_loop())
+    if state.board_task is None and SUMMARY_MODE == "board":
+        state.board_task = bot.loop.create_task(board_loop())
+    if state.digest_task is None and THREAD_LOG_MODE == "digest":
+        state.digest_task = bot.loop.create_task(digest_loop())
+
+def start_worker_pool():
+    """Spawn rendering workers and hand them the current state"""
+    state.worker_pool = WorkerPool(WORKER_PROCESSES, worker_snapshot)
+    state.worker_pool.on_result = apply_worker_result
+    state.worker_pool.start()
+    bot.loop.create_task(state.worker_pool.supervise())
+    state.worker_pool.start_result_reader(bot.loop)
+    logger.info("Multi-process mode: %d rendering worker(s)", WORKER_PROCESSES, extra=fields(stage="startup"))
+
+def worker_snapshot(index, dirty):
+    """Build the state handoff for one worker; dirty=None marks all its events"""
+    owned = [mid for mid in set(reaction_signups) | set(reaction_counts) if mid % WORKER_PROCESSES == index]
+    summaries = {mid: summary_messages[mid].id for mid in summary_messages if mid % WORKER_PROCESSES == index}
+    return {
+        "op": "snapshot",
+        "signups": {mid: {emoji: set(users) for emoji, users in reaction_signups.get(mid, {}).items()} for mid in owned},
+        "counts": {mid: dict(reaction_counts.get(mid, {})) for mid in owned},
+        "meta": {mid: event_meta[mid] for mid in owned if mid in event_meta},
+        "summaries": summaries,
+        "threads": {sid: summary_threads[sid].id for sid in summaries.values() if sid in summary_threads},
+        "archived": list(archived_threads),
+        "member_roles": dict(member_roles),
+        "role_names": dict(role_names),
+        "dirty": [mid for mid in owned if mid not in historical_events] if dirty is None else [mid for mid in dirty if mid in event_meta],
+    }
+
+def apply_worker_result(result):
+    """Mirror summary/thread ids created by workers so restarts can resume them"""
+    kind = result[0]
+    if kind == "summary":
+        _, message_id, summary_id = result
+        log_channel = bot.get_channel(LOG_CHANNEL_ID)
+        if log_channel:
+            summary_messages[message_id] = log_channel.get_partial_message(summary_id)
+    elif kind == "thread":
+        _, summary_id, thread_id = result
+        summary_threads[summary_id] = bot.get_channel(thread_id) or bot.get_partial_messageable(thread_id)
+
+async def sync_recent_reactions(limit=10):
+    """Sync reactions from recent messages"""
+    logger.info("Syncing reactions from last %d messages...", limit, extra=fields(stage="sync"))
+    
+    try:
+        monitor_channel = bot.get_channel(MONITOR_CHANNEL_ID)
+        if not monitor_channel:
+            logger.error("Monitor channel not found!", extra=fields(stage="sync"))
+            return
+        
+        log_channel = bot.get_channel(LOG_CHANNEL_ID)
+        if not log_channel:
+            logger.error("Log channel not found!", extra=fields(stage="sync"))
+            return
+        
+        clear_all_reactions()
+        summary_messages.clear()
+        summary_threads.clear()
+        archived_threads.clear()
+        summary_fingerprints.clear()
+        event_meta.clear()
+        event_starts.clear()
+        event_activity.clear()
+        historical_events.clear()
+        await build_member_index(monitor_channel.guild)
+        
+        messages = []
+        async for message in monitor_channel.history(limit=limit):
+            if message.reactions:
+                messages.append(message)
+        
+        logger.info("Found %d messages with reactions", len(messages), extra=fields(stage="sync"))
+        
+        for message in messages:
+            logger.debug("Processing message", extra=fields(message_id=message.id, stage="sync"))
+            
+            for reaction in message.reactions:
+                await load_reaction(message.id, reaction)
+        
+        logger.info("Reaction sync completed!", extra=fields(stage="sync"))
+        
+        for message in messages:
+            if has_reactions(message.id):
+                remember_event(message.id, message.content, schedule=False)
+                event_activity[message.id] = time.time()  # In the live window: reconciled for a while
+        
+        # Upcoming archived events come back without any REST calls; the rest
+        # stay on disk and are read back on demand (restore_archived)
+        loop = asyncio.get_running_loop()
+        starts = await loop.run_in_executor(None, backfill_store.scan)
+        now = time.time()
+        upcoming = [mid for mid, start in starts.items() if start and start > now and mid not in event_meta]
+        records = await loop.run_in_executor(None, lambda: [backfill_store.read(mid) for mid in upcoming])
+        restored = restore_archive(records)
+        if restored:
+            logger.info("Restored %d upcoming archived event(s)", restored, extra=fields(stage="sync"))
+        if backfill_store.superseded > len(backfill_store.offsets):
+            await loop.run_in_executor(None, backfill_store.compact)
+        # The live window was just fetched fresh: bring its archive records up to date
+        archive_dirty.update(message.id for message in messages if message.id in event_meta)
+        rebuild_reminders()
+        
+        for message_id in list(web.attendance):
+            if message_id not in event_meta:
+                web.drop_event(message_id)
+        for message_id in event_meta:
+            publish_api_event(message_id)
+        if SUMMARY_MODE == "board":
+            request_board_update()
+        
+        if state.worker_pool:
+            state.worker_pool.resync()
+            return
+        
+        for message in messages:
+            if message.id in event_meta:
+                title, timestamp_str = event_meta[message.id]
+                await post_or_edit_summary(log_channel, message.id, title, timestamp_str)
+        
+    except Exception as e:
+        logger.exception("Error during reaction sync: %s", e, extra=fields(stage="sync"))
+
+async def on_raw_reaction_add(payload):
+    if payload.channel_id != MONITOR_CHANNEL_ID:
+        return
+    
+    guild = bot.get_guild(payload.guild_id)
+    if not guild:
+        return
+    
+    log_channel = guild.get_channel(LOG_CHANNEL_ID)
+    if not log_channel:
+        return
+    
+    try:
+        monitor_channel = guild.get_channel(payload.channel_id)
+        message = await monitor_channel.fetch_message(payload.message_id)
+    except Exception:
+        return
+
+    user = payload.member or await member_resolver.resolve(guild, payload.user_id)
+    emoji_str = str(payload.emoji)
+
+    if isinstance(user, discord.Member):
+        update_member_roles(user.name, breakdown_roles(user))
+    user_ids[user.name] = user.id
+    await restore_archived(payload.message_id)
+    record_reaction(payload.message_id, emoji_str, user.name, "added")
+
+    await publish_change(log_channel, message, user, payload.emoji, "added")
+
+async def on_raw_reaction_remove(payload):
+    if payload.channel_id != MONITOR_CHANNEL_ID:
+        return
+    
+    guild = bot.get_guild(payload.guild_id)
+    if not guild:
+        return
+    
+    log_channel = guild.get_channel(LOG_CHANNEL_ID)
+    if not log_channel:
+        return
+    
+    try:
+        monitor_channel = guild.get_channel(payload.channel_id)
+        message = await monitor_channel.fetch_message(payload.message_id)
+    except Exception:
+        return
+
+    user = await member_resolver.resolve(guild, payload.user_id)
+    emoji_str = str(payload.emoji)
+
+    if isinstance(user, discord.Member):
+        update_member_roles(user.name, breakdown_roles(user))
+    user_ids[user.name] = user.id
+    await restore_archived(payload.message_id)
+    record_reaction(payload.message_id, emoji_str, user.name, "removed")
+
+    await publish_change(log_channel, message, user, payload.emoji, "removed")
+
+async def publish_change(log_channel, message, user, emoji, action):
+    """Re-render the summary and log a reaction change, locally or via a worker"""
+    title, timestamp_str = remember_event(message.id, message.content)
+    historical_events.discard(message.id)
+    event_activity[message.id] = time.time()
+    publish_api_event(message.id)
+    archive_dirty.add(message.id)
+    change_log.record(message.id, user.id, user.name, str(emoji), action)  # Queued for the log's writer thread
+    
+    line = log_line(user, emoji, action)
+    if THREAD_LOG_MODE == "digest":
+        # The digest loop posts the window's changes as one message per event
+        digest_pending[message.id].append((user.display_name, str(emoji), action))
+        line = None
+    
+    if SUMMARY_MODE == "board":
+        # Lines and re-render both wait for the board's next batch
+        if line:
+            board_log.append(f"**{title}** · {line}")
+        request_board_update()
+    
+    if state.worker_pool:
+        state.worker_pool.submit(message.id, {
+            "op": "delta",
+            "message_id": message.id,
+            "emoji": str(emoji),
+            "user": user.name,
+            "action": action,
+            "line": line,
+            "roles": list(member_roles.get(user.name, ())),
+            "title": title,
+            "timestamp": timestamp_str,
+        })
+        return
+    
+    if SUMMARY_MODE == "board":
+        return
+    
+    await post_or_edit_summary(log_channel, message.id, title, timestamp_str)
+
+    # Log to thread
+    if line and message.id in summary_messages:
+        await send_thread_lines(summary_messages[message.id], message.id, title, [line])
+
+async def on_raw_reaction_clear(payload):
+    if payload.channel_id != MONITOR_CHANNEL_ID:
+        return
+    
+    await restore_archived(payload.message_id)
+    clear_reactions(payload.message_id)
+    await publish_state(payload.message_id)
+
+async def on_raw_reaction_clear_emoji(payload):
+    if payload.channel_id != MONITOR_CHANNEL_ID:
+        return
+    
+    await restore_archived(payload.message_id)
+    clear_reactions(payload.message_id, str(payload.emoji))
+    await publish_state(payload.message_id)
+
+async def on_raw_message_delete(payload):
+    if payload.channel_id != MONITOR_CHANNEL_ID:
+        return
+    
+    await forget_event(payload.message_id)
+
+async def on_raw_bulk_message_delete(payload):
+    if payload.channel_id != MONITOR_CHANNEL_ID:
+        return
+    
+    for message_id in payload.message_ids:
+        await forget_event(message_id)
+
+async def forget_event(message_id):
+    """Drop all state for a deleted event and mark its summary as gone"""
+    clear_reactions(message_id)
+    web.drop_event(message_id)
+    title, _ = event_meta.pop(message_id, ("Sign-Ups", ""))
+    event_starts.pop(message_id, None)  # Leaves its heap entries stale
+    event_activity.pop(message_id, None)
+    historical_events.discard(message_id)
+    archive_dirty.add(message_id)  # Flushed as a tombstone so a restart does not restore it
+    summary_message = summary_messages.pop(message_id, None)
+    if summary_message is not None:
+        summary_threads.pop(summary_message.id, None)
+    if SUMMARY_MODE == "board":
+        request_board_update()
+    
+    if state.worker_pool:
+        state.worker_pool.submit(message_id, {"op": "forget", "message_id": message_id, "title": title})
+    elif summary_message is not None:
+        await mark_summary_deleted(summary_message, title)
+
+# ===== LOG THREADS =====
+
+def forget_thread(thread_id):
+    """Drop a deleted log thread from the cache; the next change creates a new one"""
+    for summary_id, thread in list(summary_threads.items()):
+        if thread.id == thread_id:
+            del summary_threads[summary_id]
+    archived_threads.discard(thread_id)
+    
+    if state.worker_pool:
+        state.worker_pool.broadcast({"op": "thread_gone", "thread_id": thread_id})
+
+async def on_raw_thread_delete(payload):
+    if payload.parent_id == LOG_CHANNEL_ID:
+        forget_thread(payload.thread_id)
+
+async def on_raw_thread_update(payload):
+    if payload.parent_id != LOG_CHANNEL_ID:
+        return
+    
+    archived = payload.data.get("thread_metadata", {}).get("archived", False)
+    if archived:
+        archived_threads.add(payload.thread_id)
+    else:
+        archived_threads.discard(payload.thread_id)
+    
+    if state.worker_pool:
+        state.worker_pool.broadcast({"op": "thread_archived", "thread_id": payload.thread_id, "archived": archived})
+
+# ===== MEMBER ROLE INDEX =====
+
+def is_monitored_guild(guild):
+    """Check whether a guild is the one holding the monitor channel"""
+    channel = bot.get_channel(MONITOR_CHANNEL_ID)
+    return channel is not None and channel.guild.id == guild.id
+
+async def apply_member_roles(user_name, roles):
+    """Update one member's index entry and re-render the events it moved"""
+    affected = update_member_roles(user_name, roles)
+    if state.worker_pool:
+        state.worker_pool.broadcast({"op": "member_roles", "user": user_name, "roles": list(roles)})
+    for message_id in affected:
+        await publish_state(message_id)
+
+async def on_member_update(before, after):
+    if before.roles == after.roles or not is_monitored_guild(after.guild):
+        return
+    member_resolver.forget(after.guild.id, after.id)
+    await apply_member_roles(after.name, breakdown_roles(after))
+
+async def on_member_join(member):
+    if is_monitored_guild(member.guild):
+        await apply_member_roles(member.name, breakdown_roles(member))
+
+async def on_member_remove(member):
+    if is_monitored_guild(member.guild):
+        await apply_member_roles(member.name, frozenset())
+
+async def apply_role_name(role_id, name):
+    """Update a breakdown role's name everywhere and re-render the events showing it (None forgets it)"""
+    if name is None:
+        role_names.pop(role_id, None)
+    else:
+        role_names[role_id] = name
+    if state.worker_pool:
+        state.worker_pool.broadcast({"op": "role_name", "role_id": role_id, "name": name})
+    for message_id in [mid for mid, counts in event_role_counts.items() if counts.get(role_id)]:
+        await publish_state(message_id)
+
+async def on_guild_role_create(role):
+    if is_monitored_guild(role.guild) and is_breakdown_role(role):
+        await apply_role_name(role.id, role.name)
+
+async def on_guild_role_update(before, after):
+    if is_monitored_guild(after.guild) and is_breakdown_role(after) and role_names.get(after.id) != after.name:
+        await apply_role_name(after.id, after.name)
+
+async def on_guild_role_delete(role):
+    if not is_monitored_guild(role.guild):
+        return
+    for user_name, roles in list(member_roles.items()):
+        if role.id in roles:
+            await apply_member_roles(user_name, roles - {role.id})
+    await apply_role_name(role.id, None)  # No event counts it any more, so nothing re-renders
+
+# ===== REMINDERS =====
+
+async def reminder_loop():
+    """Single timer task firing every event's reminders off the heap"""
+    while not bot.is_closed():
+        reminder_wakeup.clear()
+        timeout = reminder_heap[0][0] - time.time() if reminder_heap else None
+        if timeout is None or timeout > 0:
+            try:
+                await asyncio.wait_for(reminder_wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        
+        _, _, message_id, offset, start_ts, generation = heapq.heappop(reminder_heap)
+        if event_starts.get(message_id) != start_ts or reminder_generations.get(message_id) != generation:
+            continue  # Event was re-timed or deleted since this entry was pushed
+        
+        try:
+            await send_reminder(message_id, offset, start_ts)
+        except Exception as e:
+            logger.exception("Failed to send reminder: %s", e, extra=fields(message_id=message_id, stage="reminder"))
+
+async def send_reminder(message_id, offset, start_ts):
+    """Ping everyone attending or running late for an event"""
+    channel = bot.get_channel(REMINDER_CHANNEL_ID)
+    if not channel:
+        return
+    
+    names = set(attending_refs.get(message_id, {}))
+    for emoji_key, users in reaction_signups.get(message_id, {}).items():
+        if reaction_kind(emoji_key) == "late":
+            names.update(users)
+    if not names:
+        return
+    
+    title, _ = event_meta.get(message_id, ("Sign-Ups", ""))
+    mentions = [f"<@{user_ids[name]}>" if name in user_ids else name for name in sorted(names)]
+    header = f"⏰ **{title}** starts <t:{start_ts}:R> (<t:{start_ts}:F>)\n"
+    
+    # Split the pings across messages to stay under the 2000 character limit
+    chunks = []
+    current = header
+    for mention in mentions:
+        if len(current) + len(mention) + 1 > 2000:
+            chunks.append(current)
+            current = ""
+        current += mention + " "
+    chunks.append(current)
+    
+    reference = None
+    if REMINDER_CHANNEL_ID == MONITOR_CHANNEL_ID:
+        reference = channel.get_partial_message(message_id)
+    for index, chunk in enumerate(chunks):
+        await channel.send(
+            chunk,
+            reference=reference if index == 0 else None,
+            mention_author=False,
+            allowed_mentions=discord.AllowedMentions(users=True, roles=False, everyone=False)
+        )
+    logger.info(
+        "Sent T-%dm reminder to %d attendee(s)", offset // 60, len(names),
+        extra=fields(message_id=message_id, stage="reminder")
+    )
+
+async def on_raw_message_edit(payload):
+    if payload.channel_id != MONITOR_CHANNEL_ID or not await restore_archived(payload.message_id):
+        return
+    
+    content = payload.data.get("content")
+    if content is None:
+        return
+    
+    previous = event_meta[payload.message_id]
+    if remember_event(payload.message_id, content) != previous:
+        await publish_state(payload.message_id)
+
+# ===== HISTORY BACKFILL =====
+
+def archive_record(message_id):
+    """Build the archive record of one indexed event"""
+    title, timestamp_str = event_meta[message_id]
+    signups = reaction_signups.get(message_id, {})
+    return {
+        "message_id": message_id,
+        "title": title,
+        "timestamp": timestamp_str,
+        "start": event_starts.get(message_id),
+        "signups": {emoji_key: sorted(users) for emoji_key, users in signups.items()},
+        "counts": dict(reaction_counts.get(message_id, {})),
+        "bots": dict(reaction_bot_counts.get(message_id, {})),
+        "ids": {name: user_ids[name] for users in signups.values() for name in users if name in user_ids},
+    }
+
+def restore_archive(records):
+    """Load archived events the live sync did not cover; returns how many"""
+    restored = 0
+    for record in records:
+        message_id = record["message_id"]
+        if message_id in event_meta:
+            continue
+        for emoji_key, users in record["signups"].items():
+            reaction_signups[message_id][emoji_key] = set(users)
+        if record["counts"]:
+            reaction_counts[message_id].update(record["counts"])
+        if record["bots"]:
+            reaction_bot_counts[message_id].update(record["bots"])
+        user_ids.update(record["ids"])
+        rebuild_attendance(message_id)
+        event_meta[message_id] = (record["title"], record["timestamp"])
+        if record["start"] is not None:
+            event_starts[message_id] = record["start"]
+        historical_events.add(message_id)
+        restored += 1
+    return restored
+
+async def restore_archived(message_id):
+    """Bring a non-resident archived event back into memory before it is used; True if it is known"""
+    if message_id in event_meta:
+        return True
+    if not backfill_store.has(message_id):
+        return False
+    record = await asyncio.get_running_loop().run_in_executor(None, backfill_store.read, message_id)
+    if record is None or not restore_archive([record]):
+        return False
+    publish_api_event(message_id)
+    submit_load(message_id)
+    return True
+
+def submit_load(message_id):
+    """Hand a worker an event it should hold without rendering it"""
+    if state.worker_pool:
+        title, timestamp_str = event_meta[message_id]
+        state.worker_pool.submit_any({
+            "op": "load",
+            "message_id": message_id,
+            "signups": {emoji: set(users) for emoji, users in reaction_signups.get(message_id, {}).items()},
+            "counts": dict(reaction_counts.get(message_id, {})),
+            "title": title,
+            "timestamp": timestamp_str,
+        })
+
+def evict_event(message_id):
+    """Drop a historical event from memory; its archive record stays readable on demand"""
+    clear_reactions(message_id)
+    event_meta.pop(message_id, None)
+    event_starts.pop(message_id, None)
+    historical_events.discard(message_id)
+    archive_dirty.discard(message_id)  # Not deleted: its backfill record is already on disk
+    web.drop_event(message_id)
+    if state.worker_pool:
+        state.worker_pool.submit_any({"op": "evict", "message_id": message_id})
+
+async def backfill_message(message):
+    """Index one message unless live state already covers it; returns its archive record"""
+    if message.id in event_meta and message.id not in historical_events:
+        return archive_record(message.id)
+    
+    # Start from scratch: a reaction removed entirely since the last index has no entry in message.reactions
+    clear_reactions(message.id)
+    for reaction in message.reactions:
+        await load_reaction(message.id, reaction)
+    if not has_reactions(message.id):
+        return None
+    remember_event(message.id, message.content)
+    historical_events.add(message.id)
+    if event_starts.get(message.id, 0) > time.time():
+        publish_api_event(message.id)
+        submit_load(message.id)
+    return archive_record(message.id)
+
+def evict_past(records):
+    """Once a page is on disk, drop its past events from memory; they are read back on demand"""
+    now = time.time()
+    for record in records:
+        message_id = record["message_id"]
+        if message_id in historical_events and event_starts.get(message_id, 0) <= now:
+            evict_event(message_id)
+
+async def archive_loop():
+    """Append changed and deleted events to the archive in batches, so it stays current after the backfill"""
+    while not bot.is_closed():
+        await asyncio.sleep(ARCHIVE_FLUSH_SECONDS)
+        if not archive_dirty:
+            continue
+        
+        message_ids = list(archive_dirty)
+        archive_dirty.clear()
+        records = [
+            archive_record(message_id) if message_id in event_meta else {"message_id": message_id, "deleted": True}
+            for message_id in message_ids
+        ]
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, backfill_store.append, records)
+        except OSError as e:
+            logger.warning("Failed to update the archive: %s", e, extra=fields(stage="backfill"))
+            archive_dirty.update(message_ids)
+
+async def catch_up_archive(monitor_channel):
+    """Index messages posted after the newest archived one, oldest first, up to the present"""
+    loop = asyncio.get_running_loop()
+    after = backfill_store.newest_id
+    indexed = 0
+    while not bot.is_closed():
+        page = [
+            message async for message in
+            monitor_channel.history(limit=BACKFILL_PAGE_SIZE, after=discord.Object(id=after), oldest_first=True)
+        ]
+        records = []
+        for message in page:
+            if message.reactions:
+                record = await backfill_message(message)
+                if record:
+                    records.append(record)
+                await asyncio.sleep(BACKFILL_PACING_SECONDS)
+        await loop.run_in_executor(None, backfill_store.append, records)
+        evict_past(records)
+        indexed += len(records)
+        if len(page) < BACKFILL_PAGE_SIZE:
+            return indexed
+        after = page[-1].id
+    return indexed
+
+async def backfill_loop():
+    """Page through the whole monitor channel history at low priority, resuming from the checkpoint"""
+    monitor_channel = bot.get_channel(MONITOR_CHANNEL_ID)
+    if not monitor_channel:
+        return
+    
+    if backfill_store.newest_id is not None:
+        # Events posted while the bot was away, between the archive and the sync window
+        try:
+            caught_up = await catch_up_archive(monitor_channel)
+            logger.info("Archive caught up: %d newer event(s) indexed", caught_up, extra=fields(stage="backfill"))
+        except Exception as e:
+            logger.exception("Error catching up the archive: %s", e, extra=fields(stage="backfill"))
+    
+    loop = asyncio.get_running_loop()
+    checkpoint = await loop.run_in_executor(None, backfill_store.load_checkpoint)
+    if checkpoint["done"]:
+        return
+    logger.info("Backfill starting before message %s", checkpoint["before"], extra=fields(stage="backfill"))
+    
+    while not bot.is_closed():
+        try:
+            # Only one page of messages is held at a time, however long the history
+            before = discord.Object(id=checkpoint["before"]) if checkpoint["before"] else None
+            page = [message async for message in monitor_channel.history(limit=BACKFILL_PAGE_SIZE, before=before)]
+            
+            records = []
+            for message in page:
+                if message.reactions:
+                    record = await backfill_message(message)
+                    if record:
+                        records.append(record)
+                    await asyncio.sleep(BACKFILL_PACING_SECONDS)
+            
+            checkpoint = {
+                "before": page[-1].id if page else checkpoint["before"],
+                "done": len(page) < BACKFILL_PAGE_SIZE,
+                "indexed": checkpoint["indexed"] + len(records),
+            }
+            await loop.run_in_executor(None, backfill_store.save_page, records, checkpoint)
+            evict_past(records)
+        except Exception as e:
+            logger.exception("Error during backfill: %s", e, extra=fields(stage="backfill"))
+            await asyncio.sleep(RECONCILE_MIN_SECONDS)
+            continue
+        
+        logger.debug("Backfilled page down to message %s", checkpoint["before"], extra=fields(stage="backfill", sample=True))
+        if checkpoint["done"]:
+            logger.info("Backfill complete: %d event(s) indexed", checkpoint["indexed"], extra=fields(stage="backfill"))
+            return
+
+# ===== RECONCILER =====
+
+async def reconcile_loop():
+    """Low-priority background repair of state drift with an adaptive cadence"""
+    interval = RECONCILE_MIN_SECONDS
+    while not bot.is_closed():
+        try:
+            await asyncio.wait_for(reconcile_wakeup.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+        reconcile_wakeup.clear()
+        
+        try:
+            repaired = await reconcile_events()
+        except Exception as e:
+            logger.exception("Error during reconciliation: %s", e, extra=fields(stage="reconcile"))
+            repaired = 0
+        
+        if repaired:
+            logger.info("Reconciler repaired %d event(s)", repaired, extra=fields(stage="reconcile"))
+            interval = RECONCILE_MIN_SECONDS
+        else:
+            interval = min(interval * 2, RECONCILE_MAX_SECONDS)
+
+async def reconcile_events():
+    """Compare per-reaction counts with stored state and repair what drifted"""
+    monitor_channel = bot.get_channel(MONITOR_CHANNEL_ID)
+    if not monitor_channel:
+        return 0
+    
+    repaired = 0
+    for message_id in reconcile_targets():
+        try:
+            message = await monitor_channel.fetch_message(message_id)
+        except discord.NotFound:
+            await forget_event(message_id)
+            repaired += 1
+            continue
+        except discord.HTTPException as e:
+            logger.warning("Reconciler could not fetch message: %s", e, extra=fields(message_id=message_id, stage="reconcile"))
+            continue
+        
+        if await reconcile_message(message):
+            remember_event(message.id, message.content)
+            await publish_state(message.id)
+            repaired += 1
+        
+        await asyncio.sleep(RECONCILE_PACING_SECONDS)
+    
+    return repaired
+
+def reconcile_targets():
+    """Events worth a fetch: upcoming ones, and ones started or changed within the active window"""
+    cutoff = time.time() - RECONCILE_ACTIVE_SECONDS
+    return [
+        message_id for message_id in event_meta
+        if message_id not in historical_events
+        and (event_starts.get(message_id, 0) >= cutoff or event_activity.get(message_id, 0) >= cutoff)
+    ]
+
+async def reconcile_message(message):
+    """Repair only the reactions whose counts disagree; returns True if anything changed"""
+    live = {str(reaction.emoji): reaction for reaction in message.reactions}
+    changed = False
+    
+    for emoji_key, _, _ in event_reactions(message.id):
+        if emoji_key not in live:
+            clear_reactions(message.id, emoji_key)
+            changed = True
+    
+    for reaction in live.values():
+        if reaction_drifted(message.id, reaction):
+            await load_reaction(message.id, reaction)
+            changed = True
+    
+    return changed
+
+
+LISTENERS = (
+    on_ready, on_resumed,
+    on_raw_reaction_add, on_raw_reaction_remove, on_raw_reaction_clear, on_raw_reaction_clear_emoji,
+    on_raw_message_delete, on_raw_bulk_message_delete, on_raw_message_edit,
+    on_raw_thread_delete, on_raw_thread_update,
+    on_member_update, on_member_join, on_member_remove,
+    on_guild_role_create, on_guild_role_update, on_guild_role_delete,
+)
+
+async def setup(bot):
+    for listener in LISTENERS:
+        bot.add_listener(listener)
+    
+    # After a reload: point live workers and loops at the new code
+    if state.worker_pool:
+        state.worker_pool.state = worker_snapshot
+        state.worker_pool.on_result = apply_worker_result
+    if bot.is_ready():
+        start_background_tasks()
+
+async def teardown(bot):
+    for name in ("reconcile_task", "backfill_task", "archive_task", "reminder_task", "board_task", "digest_task"):
+        task = getattr(state, name)
+        if task is not None:
+            task.cancel()
+            setattr(state, name, None)
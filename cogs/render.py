@@ -0,0 +1,868 @@
+import asyncio
+import io
+import json
+import random
+import time
+import discord
+from collections import defaultdict
+from datetime import datetime
+import keep_alive as web
+import state
+from bot_log import fields, logger
+from config import (
+    BOARD_FLUSH_SECONDS, BOARD_MAX_PAGES, BULK_PROGRESS_SECONDS, BULK_RENDER_CONCURRENCY, LOG_CHANNEL_ID,
+    MONITOR_CHANNEL_ID, SHADOW_FETCH_RATE, SHADOW_SAMPLE_RATE, SUMMARY_MODE, THREAD_DIGEST_SECONDS,
+)
+from state import (
+    archive_dirty, archived_threads, board_fingerprints, board_log, board_messages, board_wakeup, bot,
+    digest_pending, event_meta, event_starts, historical_events, reaction_counts, reaction_signups,
+    reconcile_wakeup, shadow_stats, summary_fingerprints, summary_messages, summary_threads,
+)
+from cogs.tracking import (
+    EMOJI_MAP, aggregate_snapshot, attendance_totals, emoji_display_and_label, event_reactions,
+    extract_title_and_timestamp, has_reactions, reaction_drifted, reaction_kind, rebuild_attendance,
+    remember_event, role_breakdown,
+)
+
+# Everything that turns state into Discord output: summary embeds and
+# buttons, thread logs, exports and the web API snapshots.
+
+def event_payload(message_id):
+    """Build the JSON-ready attendance snapshot served by the web API"""
+    title, timestamp_str = event_meta.get(message_id, ("Sign-Ups", ""))
+    attending, late, not_attending = attendance_totals(message_id)
+    reactions = []
+    
+    for emoji_key, users, count in event_reactions(message_id):
+        emoji_obj = discord.PartialEmoji.from_str(emoji_key)
+        label, _ = emoji_display_and_label(emoji_obj)
+        reactions.append({
+            "emoji": emoji_key,
+            "label": EMOJI_MAP[emoji_obj.id][0] if emoji_obj.id in EMOJI_MAP else label,
+            "category": reaction_kind(emoji_key),
+            "count": count,
+            "users": list(users) if users else None,
+        })
+    
+    return {
+        "message_id": str(message_id),
+        "title": title,
+        "time": timestamp_str,
+        "attending": attending,
+        "late": late,
+        "not_attending": not_attending,
+        "roles": {role_name: count for role_name, count in role_breakdown(message_id)},
+        "reactions": reactions,
+    }
+
+def publish_api_event(message_id):
+    """Refresh the web API snapshot (and its ETag version) for one event"""
+    if message_id in event_meta:
+        web.publish_event(message_id, event_payload(message_id))
+
+def build_summary_embed(message_id, title, timestamp_str):
+    """Build a rich embed with names listed one per line under each reaction"""
+    emoji_data = event_reactions(message_id)
+    
+    if not emoji_data:
+        embed = discord.Embed(
+            title="📋 No sign-ups yet", 
+            description="Be the first to react!",
+            color=0x808080
+        )
+        return embed
+    
+    total_attending, _, _ = attendance_totals(message_id)
+    
+    embed = discord.Embed(
+        title=f"📋 {title}",
+        description=f"**{total_attending}** total attending",
+        color=0x00FF00
+    )
+    
+    if timestamp_str:
+        embed.add_field(
+            name="⏰ Event Time", 
+            value=f"```{timestamp_str}```", 
+            inline=False
+        )
+    
+    # Sort reactions
+    attending_reactions = []
+    other_reactions = []
+    
+    for emoji_key, users, count in emoji_data:
+        label, color = emoji_display_and_label(discord.PartialEmoji.from_str(emoji_key))
+        
+        if "Not attending" in label or "Late" in label:
+            other_reactions.append((emoji_key, users, count, label))
+        else:
+            attending_reactions.append((emoji_key, users, count, label))
+    
+    # Add attending reactions
+    for emoji_key, users, count, label in attending_reactions:
+        try:
+            emoji_obj = discord.PartialEmoji.from_str(emoji_key)
+            if hasattr(emoji_obj, 'id') and emoji_obj.id and emoji_obj.id in EMOJI_MAP:
+                clean_name = EMOJI_MAP[emoji_obj.id][0]
+            else:
+                clean_name = emoji_obj.name.replace('_', ' ').title() if hasattr(emoji_obj, 'name') else "Unknown"
+            
+            field_name = f"{clean_name} ({count})"
+            
+            if hasattr(emoji_obj, 'id') and emoji_obj.id:
+                emoji_display = f"<:{emoji_obj.name}:{emoji_obj.id}>"
+            else:
+                emoji_display = str(emoji_obj)
+                
+        except:
+            field_name = f"{label} ({count})"
+            emoji_display = emoji_key
+        
+        if users:
+            user_list = f"{emoji_display}\n" + "\n".join(users)
+        else:
+            user_list = f"{emoji_display}\n{count} reacted"
+        
+        if len(user_list) > 1024:
+            user_list = user_list[:1020] + "..."
+        
+        embed.add_field(name=field_name, value=user_list, inline=True)
+    
+    # Add other reactions
+    for emoji_key, users, count, label in other_reactions:
+        if "Not attending" in label:
+            try:
+                emoji_obj = discord.PartialEmoji.from_str(emoji_key)
+                if hasattr(emoji_obj, 'id') and emoji_obj.id and emoji_obj.id in EMOJI_MAP:
+                    clean_name = EMOJI_MAP[emoji_obj.id][0]
+                else:
+                    clean_name = "Not attending"
+                
+                field_name = f"{clean_name} ({count})"
+                
+                if hasattr(emoji_obj, 'id') and emoji_obj.id:
+                    emoji_display = f"<:{emoji_obj.name}:{emoji_obj.id}>"
+                else:
+                    emoji_display = "🚫"
+            except:
+                field_name = f"Not attending ({count})"
+                emoji_display = "🚫"
+            
+            user_list = f"{emoji_display}\n{count} not attending"
+            
+        else:
+            try:
+                emoji_obj = discord.PartialEmoji.from_str(emoji_key)
+                if hasattr(emoji_obj, 'id') and emoji_obj.id and emoji_obj.id in EMOJI_MAP:
+                    clean_name = EMOJI_MAP[emoji_obj.id][0]
+                elif "Late" in label:
+                    clean_name = "Late"
+                else:
+                    clean_name = emoji_obj.name.replace('_', ' ').title() if hasattr(emoji_obj, 'name') else "Unknown"
+                
+                field_name = f"{clean_name} ({count})"
+                
+                if hasattr(emoji_obj, 'id') and emoji_obj.id:
+                    emoji_display = f"<:{emoji_obj.name}:{emoji_obj.id}>"
+                else:
+                    emoji_display = str(emoji_obj)
+            except:
+                field_name = f"{label} ({count})"
+                emoji_display = emoji_key
+            
+            if users:
+                user_list = f"{emoji_display}\n" + "\n".join(users)
+            else:
+                user_list = f"{emoji_display}\n{count} reacted"
+        
+        if len(user_list) > 1024:
+            user_list = user_list[:1020] + "..."
+        
+        embed.add_field(name=field_name, value=user_list, inline=True)
+    
+    breakdown = role_breakdown(message_id)
+    if breakdown:
+        role_list = "\n".join(f"{name}: **{count}**" for name, count in breakdown)
+        if len(role_list) > 1024:
+            role_list = role_list[:1020] + "..."
+        embed.add_field(name="🎖️ Attending by role", value=role_list, inline=False)
+    
+    embed.set_footer(text=f"Last updated: {datetime.utcnow().strftime('%H:%M UTC')}")
+    return embed
+
+def create_summary_view(message_id):
+    """Create the button view for summary messages"""
+    view = discord.ui.View(timeout=None)  # Persistent view
+    
+    # Export button
+    export_button = discord.ui.Button(
+        label="📊 Export Attendance",
+        style=discord.ButtonStyle.primary,
+        custom_id=f"export_{message_id}"
+    )
+    
+    # Refresh button
+    refresh_button = discord.ui.Button(
+        label="🔄 Refresh",
+        style=discord.ButtonStyle.secondary,
+        custom_id=f"refresh_{message_id}"
+    )
+    
+    # Thread button
+    thread_button = discord.ui.Button(
+        label="🧵 View Logs",
+        style=discord.ButtonStyle.secondary,
+        custom_id=f"thread_{message_id}"
+    )
+    
+    view.add_item(export_button)
+    view.add_item(refresh_button)
+    view.add_item(thread_button)
+    
+    return view
+
+def summary_fingerprint(embed, view):
+    """Fingerprint a summary's content, ignoring the "Last updated" footer"""
+    data = embed.to_dict()
+    data.pop("footer", None)
+    return hash((json.dumps(data, sort_keys=True), tuple(child.custom_id for child in view.children)))
+
+async def post_or_edit_summary(log_channel, message_id, title, timestamp_str, skip_unchanged=False):
+    """Post or edit summary message WITH BUTTONS; returns created, updated or unchanged"""
+    if SUMMARY_MODE == "board":
+        request_board_update()
+        return "updated"
+    
+    summary_embed = build_summary_embed(message_id, title, timestamp_str)
+    
+    # Create buttons
+    view = create_summary_view(message_id)
+    logger.debug("Created view with %d buttons", len(view.children), extra=fields(message_id=message_id, stage="render", sample=True))
+    
+    fingerprint = summary_fingerprint(summary_embed, view)
+    render = lambda: summary_fingerprint(build_summary_embed(message_id, title, timestamp_str), create_summary_view(message_id))
+    if shadow_sample(message_id, fingerprint, render):
+        # Send the from-scratch result rather than the drifted one
+        summary_embed = build_summary_embed(message_id, title, timestamp_str)
+        fingerprint = summary_fingerprint(summary_embed, view)
+    
+    if skip_unchanged and message_id in summary_messages and summary_fingerprints.get(message_id) == fingerprint:
+        return "unchanged"
+    
+    result = "created"
+    if message_id in summary_messages:
+        try:
+            summary_message = summary_messages[message_id]
+            await summary_message.edit(embed=summary_embed, view=view)
+            logger.info("✅ Updated summary", extra=fields(message_id=message_id, stage="summary_edit", sample=True))
+            result = "updated"
+        except discord.NotFound:
+            summary_messages.pop(message_id, None)
+            summary_message = await log_channel.send(embed=summary_embed, view=view)
+            summary_messages[message_id] = summary_message
+            logger.info("✅ Created new summary", extra=fields(message_id=message_id, stage="summary_create"))
+    else:
+        summary_message = await log_channel.send(embed=summary_embed, view=view)
+        summary_messages[message_id] = summary_message
+        logger.info("✅ Created new summary", extra=fields(message_id=message_id, stage="summary_create"))
+    
+    summary_fingerprints[message_id] = fingerprint
+    return result
+
+def shadow_sample(message_id, fingerprint, render):
+    """Shadow-verify a share of renders (SHADOW_SAMPLE_RATE); returns the components that drifted"""
+    if not SHADOW_SAMPLE_RATE or random.random() >= SHADOW_SAMPLE_RATE:
+        return []
+    drifted = shadow_verify(message_id, fingerprint, render)
+    if SHADOW_FETCH_RATE and random.random() < SHADOW_FETCH_RATE:
+        asyncio.get_running_loop().create_task(shadow_verify_fetch(message_id))
+    return drifted
+
+def shadow_verify(message_id, fingerprint, render):
+    """Re-derive a rendered event from raw sign-ups; returns the components that drifted"""
+    incremental = aggregate_snapshot(message_id)
+    rebuild_attendance(message_id)
+    rebuilt = aggregate_snapshot(message_id)
+    
+    drifted = [component for component in incremental if incremental[component] != rebuilt[component]]
+    if render() != fingerprint:
+        drifted.append("embed")
+    
+    shadow_stats["checked"] += 1
+    for component in drifted:
+        shadow_stats[f"mismatch_{component}"] += 1
+    if drifted:
+        shadow_stats["mismatched_events"] += 1
+        logger.warning(
+            "Shadow check: incremental state drifted (%s), rebuilt from sign-ups", ", ".join(drifted),
+            extra=fields(message_id=message_id, stage="shadow")
+        )
+    return drifted
+
+async def shadow_verify_fetch(message_id):
+    """Compare stored reaction counts with a fresh fetch of the event message"""
+    try:
+        message = await bot.get_partial_messageable(MONITOR_CHANNEL_ID).fetch_message(message_id)
+    except discord.HTTPException as e:
+        logger.debug("Shadow fetch failed: %s", e, extra=fields(message_id=message_id, stage="shadow"))
+        return
+    
+    live = {str(reaction.emoji): reaction for reaction in message.reactions}
+    drifted = [emoji_key for emoji_key, _, _ in event_reactions(message_id) if emoji_key not in live]
+    drifted += [emoji_key for emoji_key, reaction in live.items() if reaction_drifted(message_id, reaction)]
+    
+    shadow_stats["fetch_checked"] += 1
+    if drifted:
+        shadow_stats["mismatch_fetch"] += 1
+        logger.warning(
+            "Shadow check: stored reactions disagree with Discord for %s", ", ".join(drifted),
+            extra=fields(message_id=message_id, stage="shadow")
+        )
+        reconcile_wakeup.set()  # The reconciler repairs it
+
+async def bulk_rerender(ctx, message_ids):
+    """Re-render a snapshot of summaries with bounded concurrency and progress updates"""
+    log_channel = bot.get_channel(LOG_CHANNEL_ID)
+    monitor_channel = bot.get_channel(MONITOR_CHANNEL_ID)
+    targets = list(message_ids)
+    stats = {"created": 0, "updated": 0, "unchanged": 0, "failed": 0}
+    
+    progress = await ctx.send(f"🔄 Re-rendering 0/{len(targets)} summaries...")
+    loop = asyncio.get_running_loop()
+    last_progress = loop.time()
+    done = 0
+    semaphore = asyncio.Semaphore(BULK_RENDER_CONCURRENCY)
+    
+    async def render_one(message_id):
+        nonlocal done, last_progress
+        async with semaphore:
+            try:
+                # Render off cached metadata; only fetch events we have never seen
+                if message_id not in event_meta:
+                    message = await monitor_channel.fetch_message(message_id)
+                    remember_event(message_id, message.content)
+                
+                if state.worker_pool:
+                    await publish_state(message_id)
+                    stats["updated"] += 1
+                else:
+                    title, timestamp_str = event_meta[message_id]
+                    result = await post_or_edit_summary(log_channel, message_id, title, timestamp_str, skip_unchanged=True)
+                    stats[result] += 1
+            except Exception as e:
+                logger.warning("Failed to re-render summary: %s", e, extra=fields(message_id=message_id, stage="bulk_render"))
+                stats["failed"] += 1
+        
+        done += 1
+        if loop.time() - last_progress >= BULK_PROGRESS_SECONDS and done < len(targets):
+            last_progress = loop.time()
+            try:
+                await progress.edit(content=f"🔄 Re-rendering {done}/{len(targets)} summaries...")
+            except discord.HTTPException:
+                pass
+    
+    await asyncio.gather(*(render_one(message_id) for message_id in targets))
+    
+    await progress.edit(content=(
+        f"✅ Re-rendered {len(targets)} summaries: {stats['updated']} updated, "
+        f"{stats['created']} created, {stats['unchanged']} unchanged, {stats['failed']} failed"
+    ))
+    return stats
+
+async def get_or_create_thread(summary_message, title):
+    """Get the cached thread of a summary without validating it, or create one"""
+    thread = summary_threads.get(summary_message.id)
+    if thread is not None and thread.id not in archived_threads:
+        return thread, False
+    
+    if thread is not None:
+        # Archived since its last line: reopen it once, only now that it is needed
+        archived_threads.discard(thread.id)
+        try:
+            if isinstance(thread, discord.Thread):
+                await thread.edit(archived=False)
+            return thread, False  # A partial thread is reopened by the send itself
+        except discord.NotFound:
+            summary_threads.pop(summary_message.id, None)
+
+    try:
+        thread = await summary_message.create_thread(
+            name=f"Reactions for {title}",
+            auto_archive_duration=1440
+        )
+    except discord.HTTPException as e:
+        if e.code != 160004:  # Not "a thread has already been created for this message"
+            raise
+        # A message's thread shares its id: reuse the one an earlier run created
+        thread = bot.get_channel(summary_message.id) or bot.get_partial_messageable(summary_message.id)
+        summary_threads[summary_message.id] = thread
+        return thread, False
+    summary_threads[summary_message.id] = thread
+    return thread, True
+
+async def send_thread_lines(summary_message, message_id, title, lines, retry=True):
+    """Send log lines to a summary's thread, creating it on first use; returns the thread"""
+    thread, created = await get_or_create_thread(summary_message, title)
+    if created:
+        lines = [f"🧵 **Reaction log for: {title}**\nAll reaction changes will be logged here.", *lines]
+    
+    for index, line in enumerate(lines):
+        try:
+            await thread.send(line)
+        except discord.NotFound:
+            # Deleted while no gateway event could tell us: start a new thread once
+            summary_threads.pop(summary_message.id, None)
+            if retry:
+                return await send_thread_lines(summary_message, message_id, title, lines[index:], retry=False)
+            logger.warning("Log thread disappeared", extra=fields(message_id=message_id, stage="thread_log"))
+            break
+        except Exception as e:
+            logger.warning("Failed to send log in thread: %s", e, extra=fields(message_id=message_id, stage="thread_log"))
+    return thread
+
+def log_line(user, emoji, action):
+    """Create log line for thread"""
+    time_str = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
+    if hasattr(emoji, 'id') and emoji.id:
+        emoji_display = f"<:{emoji.name}:{emoji.id}>"
+    else:
+        emoji_display = str(emoji)
+    return f"[{time_str}] {user.display_name} {action} reaction {emoji_display}"
+
+# Button interaction handler
+async def on_interaction(interaction: discord.Interaction):
+    """Handle button clicks"""
+    if not interaction.data or interaction.type != discord.InteractionType.component:
+        return
+    
+    custom_id = interaction.data.get('custom_id')
+    if not custom_id:
+        return
+    
+    logger.info("Button clicked: %s", custom_id, extra=fields(stage="interaction", sample=True))
+    
+    # Handle test buttons
+    if custom_id == "test_export":
+        await interaction.response.send_message("✅ Test export button works!", ephemeral=True)
+        return
+    elif custom_id == "test_refresh":
+        await interaction.response.send_message("✅ Test refresh button works!", ephemeral=True)
+        return
+    elif custom_id == "test_button_simple":
+        await interaction.response.send_message("✅ Simple button works!", ephemeral=True)
+        return
+    
+    # Parse real button actions
+    try:
+        action, message_id_str = custom_id.split('_', 1)
+        message_id = int(message_id_str)
+        logger.debug("Parsed button: action=%s", action, extra=fields(message_id=message_id, stage="interaction", sample=True))
+    except (ValueError, AttributeError):
+        await interaction.response.send_message("❌ Invalid button action.", ephemeral=True)
+        return
+    
+    # Handle button actions
+    if action == "export":
+        await handle_export_button(interaction, message_id)
+    elif action == "refresh":
+        await handle_refresh_button(interaction, message_id)
+    elif action == "thread":
+        await handle_thread_button(interaction, message_id)
+    else:
+        await interaction.response.send_message("❌ Unknown button action.", ephemeral=True)
+
+async def handle_export_button(interaction: discord.Interaction, message_id: int):
+    """Handle export button click"""
+    try:
+        await interaction.response.defer(ephemeral=True)
+        
+        monitor_channel = bot.get_channel(MONITOR_CHANNEL_ID)
+        message = await monitor_channel.fetch_message(message_id)
+        title, timestamp_str = extract_title_and_timestamp(message.content)
+        
+        if not has_reactions(message_id):
+            await interaction.followup.send("❌ No reaction data found.", ephemeral=True)
+            return
+        
+        # Quick summary for button export
+        message_author_name = message.author.name
+        
+        export_text = f"📊 **QUICK EXPORT**\n"
+        export_text += f"📋 **Event:** {title}\n"
+        export_text += f"📅 **Exported:** {datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC')}\n"
+        export_text += "=" * 40 + "\n\n"
+        
+        attending_count, late_count, not_attending_count = attendance_totals(message_id, exclude=message_author_name)
+        
+        export_text += f"📈 **SUMMARY**\n"
+        export_text += f"✅ Attending: {attending_count}\n"
+        export_text += f"⏳ Late: {late_count}\n"
+        export_text += f"❌ Not Attending: {not_attending_count}\n"
+        export_text += f"👤 Event Creator: {message_author_name} (excluded)\n\n"
+        export_text += f"💡 Use `!export_attendance {message_id}` for detailed lists."
+        
+        await interaction.followup.send(f"```\n{export_text}\n```", ephemeral=True)
+        
+    except Exception as e:
+        await interaction.followup.send(f"❌ Error: {e}", ephemeral=True)
+
+async def handle_refresh_button(interaction: discord.Interaction, message_id: int):
+    """Handle refresh button click"""
+    try:
+        await interaction.response.defer()
+        
+        monitor_channel = bot.get_channel(MONITOR_CHANNEL_ID)
+        message = await monitor_channel.fetch_message(message_id)
+        remember_event(message_id, message.content)
+        
+        # Through publish_state, so in worker mode the owning worker renders it
+        await publish_state(message_id)
+        await interaction.followup.send("✅ Summary refreshed!", ephemeral=True)
+        
+    except Exception as e:
+        await interaction.followup.send(f"❌ Error: {e}", ephemeral=True)
+
+async def handle_thread_button(interaction: discord.Interaction, message_id: int):
+    """Handle thread button click"""
+    try:
+        await interaction.response.defer(ephemeral=True)
+        
+        # Cached entries are dropped by thread delete events, so no fetch is needed
+        summary_message = summary_messages.get(message_id)
+        thread = summary_threads.get(summary_message.id) if summary_message else None
+        if thread is not None:
+            await interaction.followup.send(f"🧵 **Thread:** <#{thread.id}>", ephemeral=True)
+        else:
+            await interaction.followup.send("❌ No thread found. Threads are created when reactions are logged.", ephemeral=True)
+            
+    except Exception as e:
+        await interaction.followup.send(f"❌ Error: {e}", ephemeral=True)
+
+async def publish_state(message_id):
+    """Re-render a summary after its state was replaced wholesale"""
+    if message_id not in event_meta:
+        return
+    
+    title, timestamp_str = event_meta[message_id]
+    publish_api_event(message_id)
+    archive_dirty.add(message_id)
+    if SUMMARY_MODE == "board":
+        request_board_update()
+    
+    if state.worker_pool:
+        state.worker_pool.submit(message_id, {
+            "op": "replace",
+            "message_id": message_id,
+            "signups": {emoji: set(users) for emoji, users in reaction_signups.get(message_id, {}).items()},
+            "counts": dict(reaction_counts.get(message_id, {})),
+            "title": title,
+            "timestamp": timestamp_str,
+        })
+        return
+    
+    log_channel = bot.get_channel(LOG_CHANNEL_ID)
+    if log_channel:
+        await post_or_edit_summary(log_channel, message_id, title, timestamp_str)
+
+async def mark_summary_deleted(summary_message, title):
+    """Replace a summary with a tombstone once its event message is gone"""
+    embed = discord.Embed(
+        title=f"🗑️ {title}",
+        description="The event message was deleted.",
+        color=0x808080
+    )
+    try:
+        await summary_message.edit(embed=embed, view=None)
+    except discord.HTTPException as e:
+        logger.warning("Failed to mark summary %s as deleted: %s", summary_message.id, e, extra=fields(stage="forget"))
+
+def build_export_text(message_id, title, timestamp_str, message_author_name):
+    """Build the detailed attendance export text for one event from its aggregates"""
+    export_text = f"📊 **ATTENDANCE EXPORT**\n"
+    export_text += f"📋 **Event:** {title}\n"
+    if timestamp_str:
+        export_text += f"⏰ **Time:** {timestamp_str}\n"
+    export_text += f"📅 **Exported:** {datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC')}\n"
+    export_text += "=" * 50 + "\n\n"
+    
+    # Track all users and their attendance status
+    attending_reactions = []
+    not_attending_reactions = []
+    late_reactions = []
+    
+    for emoji_key, users, count in event_reactions(message_id):
+        label, _ = emoji_display_and_label(discord.PartialEmoji.from_str(emoji_key))
+        
+        # Get clean emoji name
+        try:
+            emoji_obj = discord.PartialEmoji.from_str(emoji_key)
+            if hasattr(emoji_obj, 'id') and emoji_obj.id and emoji_obj.id in EMOJI_MAP:
+                clean_name = EMOJI_MAP[emoji_obj.id][0]
+            elif "Not attending" in label:
+                clean_name = "Not attending"
+            elif "Late" in label:
+                clean_name = "Late"
+            else:
+                clean_name = emoji_obj.name.replace('_', ' ').title() if hasattr(emoji_obj, 'name') else "Unknown"
+        except:
+            clean_name = label
+        
+        if "Not attending" in label:
+            not_attending_reactions.append((clean_name, users, count))
+        elif "Late" in label:
+            late_reactions.append((clean_name, users, count))
+        else:
+            attending_reactions.append((clean_name, users, count))
+    
+    # Totals, with the message author removed from the attending count
+    total_attending, total_late, total_not_attending = attendance_totals(message_id, exclude=message_author_name)
+    breakdown = role_breakdown(message_id)
+    
+    export_text += f"📈 **SUMMARY**\n"
+    export_text += f"✅ Attending: {total_attending}\n"
+    export_text += f"⏳ Late: {total_late}\n"
+    export_text += f"❌ Not Attending: {total_not_attending}\n"
+    export_text += f"👤 Event Creator: {message_author_name} (excluded from attending count)\n\n"
+    
+    # Role breakdown of attendees
+    if breakdown:
+        export_text += "🎖️ **BY ROLE**\n"
+        for role_name, count in breakdown:
+            export_text += f"**{role_name}:** {count}\n"
+        export_text += "\n"
+    
+    # List attending users
+    if attending_reactions:
+        export_text += "✅ **ATTENDING**\n"
+        for reaction_name, users, count in attending_reactions:
+            # Filter out message author
+            filtered_users = [u for u in users if u != message_author_name]
+            if filtered_users:
+                export_text += f"**{reaction_name}:** {', '.join(filtered_users)}\n"
+            elif not users:
+                export_text += f"**{reaction_name}:** {count} (count only)\n"
+        export_text += "\n"
+    
+    # List late users
+    if late_reactions:
+        export_text += "⏳ **LATE**\n"
+        for reaction_name, users, count in late_reactions:
+            # Filter out message author
+            filtered_users = [u for u in users if u != message_author_name]
+            if filtered_users:
+                export_text += f"**{reaction_name}:** {', '.join(filtered_users)}\n"
+            elif not users:
+                export_text += f"**{reaction_name}:** {count} (count only)\n"
+        export_text += "\n"
+    
+    # List not attending users
+    if not_attending_reactions:
+        export_text += "❌ **NOT ATTENDING**\n"
+        for reaction_name, users, count in not_attending_reactions:
+            # Don't filter message author for not attending
+            if users:
+                export_text += f"**{reaction_name}:** {', '.join(users)}\n"
+            else:
+                export_text += f"**{reaction_name}:** {count} (count only)\n"
+        export_text += "\n"
+    
+    return export_text
+
+async def send_export(channel, export_text, title):
+    """Send an export as a message, or as a file if it is too long"""
+    # If export is too long, send as file
+    if len(export_text) > 1900:
+        # Create a text file
+        file_name = f"attendance_{title.replace(' ', '_')}_{datetime.utcnow().strftime('%Y%m%d_%H%M')}.txt"
+        
+        discord_file = discord.File(fp=io.BytesIO(export_text.encode('utf-8')), filename=file_name)
+        await channel.send("📊 **Attendance export (file too large for message):**", file=discord_file)
+    else:
+        # Send as message
+        await channel.send(f"```\n{export_text}\n```")
+
+# ===== EVENT BOARD =====
+
+BOARD_HEADER = "📋 **Event board**"
+EMBED_TOTAL_LIMIT = 6000  # Discord's cap on all embeds of one message combined
+
+def request_board_update():
+    """Mark the board dirty; the board loop folds every change in a batch into one edit per page"""
+    board_wakeup.set()
+
+def board_events():
+    """Upcoming events in start order; live events without a start time go last"""
+    now = time.time()
+    upcoming = [
+        message_id for message_id in event_meta
+        if (event_starts[message_id] > now if message_id in event_starts else message_id not in historical_events)
+    ]
+    return sorted(upcoming, key=lambda message_id: (message_id not in event_starts, event_starts.get(message_id, 0), message_id))
+
+def build_board_embed(message_id, monitor_channel):
+    """Build one event's compact board entry from its aggregates"""
+    title, _ = event_meta[message_id]
+    attending, late, not_attending = attendance_totals(message_id)
+    
+    lines = []
+    start_ts = event_starts.get(message_id)
+    if start_ts:
+        lines.append(f"🕒 <t:{start_ts}:F> (<t:{start_ts}:R>)")
+    lines.append(f"✅ {attending} attending · ⏳ {late} late · ❌ {not_attending} not attending")
+    for emoji_key, _, count in event_reactions(message_id):
+        if reaction_kind(emoji_key) == "attending":
+            label, _ = emoji_display_and_label(discord.PartialEmoji.from_str(emoji_key))
+            lines.append(f"{label}: {count}")
+    if monitor_channel:
+        lines.append(f"[Jump to sign-up](https://discord.com/channels/{monitor_channel.guild.id}/{MONITOR_CHANNEL_ID}/{message_id})")
+    
+    return discord.Embed(title=title[:256], description="\n".join(lines)[:4096], color=0x00FF00)
+
+def pack_board(embeds):
+    """Split embeds into pages of at most 10 and within the per-message size cap"""
+    pages = [[]]
+    size = 0
+    for embed in embeds:
+        if len(pages[-1]) == 10 or size + len(embed) > EMBED_TOTAL_LIMIT:
+            pages.append([])
+            size = 0
+        pages[-1].append(embed)
+        size += len(embed)
+    return pages
+
+async def adopt_board_messages(log_channel):
+    """Reuse the board pinned by a previous run instead of posting a new one"""
+    pins = [message async for message in log_channel.pins()]
+    pages = sorted(
+        (message for message in pins if message.author.id == bot.user.id and message.content.startswith(BOARD_HEADER)),
+        key=lambda message: message.id
+    )
+    board_messages[:] = pages
+    board_fingerprints[:] = [None] * len(pages)
+
+async def send_board_page(log_channel, content, embeds):
+    page = await log_channel.send(content=content, embeds=embeds)
+    try:
+        await page.pin()
+    except discord.HTTPException as e:
+        logger.warning("Failed to pin board page: %s", e, extra=fields(stage="board"))
+    return page
+
+async def render_board(log_channel):
+    """Edit only the board pages whose content changed, then flush queued log lines"""
+    events = board_events()
+    monitor_channel = bot.get_channel(MONITOR_CHANNEL_ID)
+    embeds = []
+    for message_id in events:
+        embed = build_board_embed(message_id, monitor_channel)
+        render = lambda: json.dumps(build_board_embed(message_id, monitor_channel).to_dict(), sort_keys=True)
+        if shadow_sample(message_id, json.dumps(embed.to_dict(), sort_keys=True), render):
+            embed = build_board_embed(message_id, monitor_channel)  # The from-scratch result
+        embeds.append(embed)
+    pages = pack_board(embeds)
+    if len(pages) > BOARD_MAX_PAGES:
+        shown = sum(len(page) for page in pages[:BOARD_MAX_PAGES])
+        logger.warning("Board is full: showing %d of %d events", shown, len(events), extra=fields(stage="board"))
+        pages = pages[:BOARD_MAX_PAGES]
+    # Pages no longer needed are blanked, not deleted, so they stay pinned in order
+    pages += [[]] * (len(board_messages) - len(pages))
+    
+    for index, embeds in enumerate(pages):
+        if index == 0:
+            content = f"{BOARD_HEADER} · {len(events)} upcoming event(s)" if events else f"{BOARD_HEADER} · No upcoming events."
+        else:
+            content = f"{BOARD_HEADER} (continued)"
+        fingerprint = hash((content, json.dumps([embed.to_dict() for embed in embeds], sort_keys=True)))
+        if index < len(board_fingerprints) and board_fingerprints[index] == fingerprint:
+            continue
+        
+        if index < len(board_messages):
+            try:
+                await board_messages[index].edit(content=content, embeds=embeds)
+            except discord.NotFound:
+                board_messages[index] = await send_board_page(log_channel, content, embeds)
+            board_fingerprints[index] = fingerprint
+        else:
+            board_messages.append(await send_board_page(log_channel, content, embeds))
+            board_fingerprints.append(fingerprint)
+    
+    if board_log and board_messages:
+        # The whole batch of change lines goes out in as few messages as fit
+        chunks = [""]
+        for line in board_log:
+            if len(chunks[-1]) + len(line) + 1 > 2000:
+                chunks.append("")
+            chunks[-1] += line + "\n"
+        board_log.clear()
+        await send_thread_lines(board_messages[0], None, "Event board", chunks)
+
+async def board_loop():
+    """Keep the pinned event board current, one coalesced render per batch of changes"""
+    log_channel = bot.get_channel(LOG_CHANNEL_ID)
+    if not log_channel:
+        return
+    if not board_messages:
+        await adopt_board_messages(log_channel)
+    board_wakeup.set()
+    
+    while not bot.is_closed():
+        # Also wake when the next event starts, so it drops off the board
+        now = time.time()
+        next_start = min((start_ts for start_ts in event_starts.values() if start_ts > now), default=None)
+        try:
+            await asyncio.wait_for(board_wakeup.wait(), timeout=next_start - now + 1 if next_start else None)
+        except asyncio.TimeoutError:
+            pass
+        await asyncio.sleep(BOARD_FLUSH_SECONDS)
+        board_wakeup.clear()
+        
+        try:
+            await render_board(log_channel)
+        except Exception as e:
+            logger.exception("Error rendering the event board: %s", e, extra=fields(stage="board"))
+
+# ===== THREAD DIGESTS =====
+
+def digest_text(title, changes, since, until):
+    """Summarize one event's batched reaction changes as a single thread message"""
+    grouped = defaultdict(list)
+    for name, emoji_key, action in changes:
+        grouped[(emoji_key, action)].append(name)
+    
+    lines = [f"🗒️ **{title}** · {len(changes)} change(s) {since:%H:%M}–{until:%H:%M} UTC"]
+    for (emoji_key, action), names in grouped.items():
+        label, _ = emoji_display_and_label(discord.PartialEmoji.from_str(emoji_key))
+        lines.append(f"{'➕' if action == 'added' else '➖'} {label}: {', '.join(names)}")
+    return "\n".join(lines)[:2000]
+
+async def digest_loop():
+    """Post each changed event's reaction changes as one digest per window (THREAD_LOG_MODE=digest)"""
+    since = datetime.utcnow()
+    while not bot.is_closed():
+        await asyncio.sleep(THREAD_DIGEST_SECONDS)
+        until = datetime.utcnow()
+        pending = dict(digest_pending)
+        digest_pending.clear()
+        
+        for message_id, changes in pending.items():
+            title, _ = event_meta.get(message_id, ("Sign-Ups", ""))
+            text = digest_text(title, changes, since, until)
+            if SUMMARY_MODE == "board":
+                board_log.append(text)
+                continue
+            summary_message = summary_messages.get(message_id)
+            if summary_message is None:
+                continue
+            try:
+                await send_thread_lines(summary_message, message_id, title, [text])
+            except Exception as e:
+                logger.warning("Failed to send digest: %s", e, extra=fields(message_id=message_id, stage="thread_log"))
+        
+        if pending and SUMMARY_MODE == "board":
+            request_board_update()
+        since = until
+
+
+async def setup(bot):
+    bot.add_listener(on_interaction)
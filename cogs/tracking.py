@@ -0,0 +1,398 @@
+import bisect
+import heapq
+import re
+import time
+import discord
+from datetime import datetime
+from config import BREAKDOWN_ROLE_IDS, COUNT_ONLY_CATEGORIES, REMINDER_OFFSETS
+from state import (
+    attending_refs, event_meta, event_role_counts, event_starts, event_totals, member_roles,
+    reaction_bot_counts, reaction_counts, reaction_rosters, reaction_signups, reminder_heap,
+    reminder_generations, reminder_seq, reminder_wakeup, role_names, user_events, user_ids,
+)
+
+# Emoji map and all sign-up state logic: parsing events, applying reaction
+# deltas and keeping the per-event aggregates current. No listeners here.
+
+_count_only_cache = {}
+_reaction_kind_cache = {}
+
+# Emoji ID mappings for wording and emoji display
+EMOJI_MAP = {
+    1025015433054662676: ("Carrier Star Wing", None),
+    718534017082720339: ("Squadron 1", None),
+    663133357592412181: ("Attending", None),
+    1025067230347661412: ("Athena Training", None),
+    663134181089607727: ("Not attending", None),
+    792085274149519420: ("Pathfinders", None),
+    1025067188102643853: ("Trident", None),
+    1091115981788684318: ("Renegade", None),
+}
+
+# Updated regex patterns
+TIMESTAMP_F_RE = re.compile(r"<t:(\d+):F>")
+PING_RE = re.compile(r"^<@!?(\d+)>$")
+ROLE_MENTION_RE = re.compile(r"^<@&(\d+)>$")
+MIXED_MENTIONS_RE = re.compile(r"^(<@[!&]?\d+>\s*)+$")
+
+def extract_title_and_timestamp(content: str):
+    """Extract title and timestamp from message content."""
+    lines = [line.strip() for line in content.splitlines() if line.strip()]
+    
+    if not lines:
+        return "Sign-Ups", ""
+    
+    title = None
+    
+    # Find the first line that isn't just mentions
+    for line in lines:
+        if MIXED_MENTIONS_RE.match(line) or PING_RE.match(line) or ROLE_MENTION_RE.match(line):
+            continue
+        title = line
+        break
+    
+    if not title:
+        title = "Sign-Ups"
+    
+    # Extract timestamp
+    timestamp_str = ""
+    match = TIMESTAMP_F_RE.search(content)
+    if match:
+        ts = int(match.group(1))
+        dt = datetime.utcfromtimestamp(ts)
+        timestamp_str = dt.strftime("%A, %d %B %Y %H:%M UTC")
+    
+    return title, timestamp_str
+
+def emoji_display_and_label(emoji_obj):
+    """Get display label for emoji"""
+    if hasattr(emoji_obj, "id") and emoji_obj.id and emoji_obj.id in EMOJI_MAP:
+        clean_name, color = EMOJI_MAP[emoji_obj.id]
+        emoji_display = f"<:{emoji_obj.name}:{emoji_obj.id}>"
+        return f"{emoji_display} {clean_name}", color
+    
+    name = str(emoji_obj)
+    if name == "⏳":
+        return "⏳ Late", None
+    if (name == "❌" or name == ":cross~1:" or "cross" in name.lower() or 
+        name == "<:cross:663134181089607727>" or ":cross:" in name):
+        return "🚫 Not attending", None
+    
+    if hasattr(emoji_obj, 'name') and hasattr(emoji_obj, 'id') and emoji_obj.id:
+        emoji_display = f"<:{emoji_obj.name}:{emoji_obj.id}>"
+        clean_name = emoji_obj.name.replace('_', ' ').title()
+        return f"{emoji_display} {clean_name}", None
+    
+    return name, None
+
+def event_start(content):
+    """Get the event start (unix seconds) from message content, if any"""
+    match = TIMESTAMP_F_RE.search(content)
+    return int(match.group(1)) if match else None
+
+def remember_event(message_id, content, schedule=True):
+    """Cache an event's title/time and keep its reminders in step with its start"""
+    event_meta[message_id] = extract_title_and_timestamp(content)
+    start_ts = event_start(content)
+    if start_ts is None:
+        event_starts.pop(message_id, None)
+    elif schedule:
+        schedule_reminders(message_id, start_ts)
+    else:
+        event_starts[message_id] = start_ts
+    return event_meta[message_id]
+
+def is_count_only(emoji_key):
+    """Check whether an emoji's category is tracked as a bare count"""
+    if emoji_key not in _count_only_cache:
+        label, _ = emoji_display_and_label(discord.PartialEmoji.from_str(emoji_key))
+        _count_only_cache[emoji_key] = any(category in label for category in COUNT_ONLY_CATEGORIES)
+    return _count_only_cache[emoji_key]
+
+def reaction_kind(emoji_key):
+    """Classify an emoji as attending, late or not_attending"""
+    if emoji_key not in _reaction_kind_cache:
+        label, _ = emoji_display_and_label(discord.PartialEmoji.from_str(emoji_key))
+        if "Not attending" in label:
+            _reaction_kind_cache[emoji_key] = "not_attending"
+        elif "Late" in label:
+            _reaction_kind_cache[emoji_key] = "late"
+        else:
+            _reaction_kind_cache[emoji_key] = "attending"
+    return _reaction_kind_cache[emoji_key]
+
+def _total_key(emoji_key):
+    kind = reaction_kind(emoji_key)
+    if kind != "attending":
+        return kind
+    return "count_only_attending" if is_count_only(emoji_key) else None
+
+def _adjust_total(message_id, emoji_key, delta):
+    key = _total_key(emoji_key)
+    if key is None:
+        return
+    totals = event_totals[message_id]
+    totals[key] += delta
+    if totals[key] <= 0:
+        del totals[key]
+    if not totals:
+        del event_totals[message_id]
+
+def record_reaction(message_id, emoji_key, user_name, action):
+    """Apply one gateway reaction delta to the in-memory state and aggregates"""
+    if is_count_only(emoji_key):
+        counts = reaction_counts[message_id]
+        if action == "added":
+            counts[emoji_key] += 1
+            _adjust_total(message_id, emoji_key, 1)
+        elif counts.get(emoji_key, 0) > 0:
+            counts[emoji_key] -= 1
+            if not counts[emoji_key]:
+                del counts[emoji_key]
+            _adjust_total(message_id, emoji_key, -1)
+        if not counts:
+            del reaction_counts[message_id]
+        return
+    
+    attending = reaction_kind(emoji_key) == "attending"
+    if action == "added":
+        if user_name not in reaction_signups[message_id][emoji_key]:
+            reaction_signups[message_id][emoji_key].add(user_name)
+            bisect.insort(reaction_rosters[message_id].setdefault(emoji_key, []), user_name)
+            if attending:
+                track_attendance(message_id, user_name, 1)
+            else:
+                _adjust_total(message_id, emoji_key, 1)
+    elif user_name in reaction_signups.get(message_id, {}).get(emoji_key, ()):
+        reaction_signups[message_id][emoji_key].remove(user_name)
+        roster = reaction_rosters[message_id][emoji_key]
+        del roster[bisect.bisect_left(roster, user_name)]
+        if not reaction_signups[message_id][emoji_key]:
+            del reaction_signups[message_id][emoji_key]
+            del reaction_rosters[message_id][emoji_key]
+            if not reaction_rosters[message_id]:
+                del reaction_rosters[message_id]
+        if attending:
+            track_attendance(message_id, user_name, -1)
+        else:
+            _adjust_total(message_id, emoji_key, -1)
+
+def _drop_reactions(message_id, emoji_key=None):
+    for store in (reaction_signups, reaction_counts, reaction_bot_counts, reaction_rosters):
+        if emoji_key is None:
+            store.pop(message_id, None)
+        elif message_id in store:
+            store[message_id].pop(emoji_key, None)
+            if not store[message_id]:
+                del store[message_id]
+
+def clear_reactions(message_id, emoji_key=None):
+    """Drop the state for one emoji on a message, or for the whole message"""
+    _drop_reactions(message_id, emoji_key)
+    rebuild_attendance(message_id)
+
+def clear_all_reactions():
+    """Drop every event's reaction state and derived counters"""
+    for store in (reaction_signups, reaction_counts, reaction_bot_counts, reaction_rosters,
+                  attending_refs, user_events, event_role_counts, event_totals):
+        store.clear()
+
+def track_attendance(message_id, user_name, delta):
+    """Adjust a user's attending-emoji refcount, updating role counters on 0 <-> 1"""
+    refs = attending_refs[message_id]
+    refs[user_name] += delta
+    if delta > 0 and refs[user_name] == 1:
+        user_events[user_name].add(message_id)
+        for role_id in member_roles.get(user_name, ()):
+            event_role_counts[message_id][role_id] += 1
+    elif refs[user_name] <= 0:
+        del refs[user_name]
+        if not refs:
+            del attending_refs[message_id]
+        user_events[user_name].discard(message_id)
+        if not user_events[user_name]:
+            del user_events[user_name]
+        for role_id in member_roles.get(user_name, ()):
+            _decrement_role(message_id, role_id)
+
+def _decrement_role(message_id, role_id):
+    counts = event_role_counts[message_id]
+    counts[role_id] -= 1
+    if counts[role_id] <= 0:
+        del counts[role_id]
+    if not counts:
+        del event_role_counts[message_id]
+
+def rebuild_attendance(message_id):
+    """Recompute one event's aggregates after a wholesale change (sync, clear, repair)"""
+    for user_name in attending_refs.pop(message_id, {}):
+        user_events[user_name].discard(message_id)
+        if not user_events[user_name]:
+            del user_events[user_name]
+    event_role_counts.pop(message_id, None)
+    event_totals.pop(message_id, None)
+    reaction_rosters.pop(message_id, None)
+    
+    for emoji_key, users in reaction_signups.get(message_id, {}).items():
+        reaction_rosters[message_id][emoji_key] = sorted(users)
+        if reaction_kind(emoji_key) == "attending":
+            for user_name in users:
+                track_attendance(message_id, user_name, 1)
+        else:
+            _adjust_total(message_id, emoji_key, len(users))
+    for emoji_key, count in reaction_counts.get(message_id, {}).items():
+        _adjust_total(message_id, emoji_key, count)
+
+def attendance_totals(message_id, exclude=None):
+    """Get (attending, late, not attending) for an event in O(1)"""
+    totals = event_totals.get(message_id, {})
+    refs = attending_refs.get(message_id, {})
+    attending = len(refs) - (1 if exclude in refs else 0) + totals.get("count_only_attending", 0)
+    return attending, totals.get("late", 0), totals.get("not_attending", 0)
+
+def is_breakdown_role(role):
+    """Check whether a role is shown in the attendance breakdown"""
+    if BREAKDOWN_ROLE_IDS:
+        return role.id in BREAKDOWN_ROLE_IDS
+    return not role.is_default() and not role.managed
+
+def breakdown_roles(member):
+    """Get the breakdown role ids of a member"""
+    return frozenset(role.id for role in getattr(member, "roles", ()) if is_breakdown_role(role))
+
+def update_member_roles(user_name, roles):
+    """Move a member's attending events between role counters: O(events attended)"""
+    old_roles = member_roles.get(user_name, frozenset())
+    if roles == old_roles:
+        return []
+    
+    if roles:
+        member_roles[user_name] = roles
+    else:
+        member_roles.pop(user_name, None)
+    
+    affected = list(user_events.get(user_name, ()))
+    for message_id in affected:
+        for role_id in old_roles - roles:
+            _decrement_role(message_id, role_id)
+        for role_id in roles - old_roles:
+            event_role_counts[message_id][role_id] += 1
+    return affected
+
+async def build_member_index(guild):
+    """Index every member's breakdown roles once at startup: O(members)"""
+    if not guild.chunked:
+        await guild.chunk()
+    role_names.clear()
+    role_names.update({role.id: role.name for role in guild.roles if is_breakdown_role(role)})
+    member_roles.clear()
+    for member in guild.members:
+        roles = breakdown_roles(member)
+        if roles:
+            member_roles[member.name] = roles
+
+def role_breakdown(message_id):
+    """List (role name, attending count) for an event, largest first"""
+    counts = event_role_counts.get(message_id, {})
+    rows = [(role_names.get(role_id, f"Role {role_id}"), count) for role_id, count in counts.items() if count]
+    return sorted(rows, key=lambda row: (-row[1], row[0]))
+
+async def load_reaction(message_id, reaction):
+    """Replace the stored state of one reaction from Discord"""
+    emoji_str = str(reaction.emoji)
+    _drop_reactions(message_id, emoji_str)
+    
+    try:
+        # Count-only categories need no user pagination at all
+        if is_count_only(emoji_str):
+            count = reaction.count - (1 if reaction.me else 0)
+            if count > 0:
+                reaction_counts[message_id][emoji_str] = count
+            return
+        
+        users = set()
+        bots = 0
+        async for user in reaction.users():
+            if user.bot:
+                bots += 1
+            else:
+                users.add(user.name)
+                user_ids[user.name] = user.id
+        if users:
+            reaction_signups[message_id][emoji_str] = users
+        if bots:
+            reaction_bot_counts[message_id][emoji_str] = bots
+    finally:
+        rebuild_attendance(message_id)
+
+def event_reactions(message_id):
+    """List (emoji_key, sorted users, count) per reaction; users is empty for count-only categories"""
+    rows = [(emoji_key, users, len(users)) for emoji_key, users in reaction_rosters.get(message_id, {}).items() if users]
+    rows += [(emoji_key, [], count) for emoji_key, count in reaction_counts.get(message_id, {}).items() if count]
+    return rows
+
+def has_reactions(message_id):
+    """Check whether any reaction state is held for a message"""
+    return message_id in reaction_signups or message_id in reaction_counts
+
+def reaction_drifted(message_id, reaction):
+    """Check whether the stored count of a live reaction disagrees with Discord's"""
+    emoji_key = str(reaction.emoji)
+    if is_count_only(emoji_key):
+        stored = reaction_counts.get(message_id, {}).get(emoji_key, 0)
+        expected = reaction.count - (1 if reaction.me else 0)
+    else:
+        stored = len(reaction_signups.get(message_id, {}).get(emoji_key, ()))
+        expected = reaction.count - reaction_bot_counts.get(message_id, {}).get(emoji_key, 0)
+    return stored != max(expected, 0)
+
+def aggregate_snapshot(message_id):
+    """Copy one event's incremental aggregates so they can be compared"""
+    return {
+        "rosters": {emoji_key: list(users) for emoji_key, users in reaction_rosters.get(message_id, {}).items()},
+        "attending": dict(attending_refs.get(message_id, {})),
+        "roles": dict(event_role_counts.get(message_id, {})),
+        "totals": dict(event_totals.get(message_id, {})),
+    }
+
+# ===== REMINDER SCHEDULE =====
+
+def schedule_reminders(message_id, start_ts):
+    """(Re)schedule one event's reminders: O(log n) per offset"""
+    if event_starts.get(message_id) == start_ts:
+        return
+    event_starts[message_id] = start_ts
+    generation = reminder_generations[message_id] = next(reminder_seq)
+    
+    earliest = reminder_heap[0][0] if reminder_heap else None
+    now = time.time()
+    for offset in REMINDER_OFFSETS:
+        fire_at = start_ts - offset
+        if fire_at > now:
+            heapq.heappush(reminder_heap, (fire_at, next(reminder_seq), message_id, offset, start_ts, generation))
+    
+    # Only wake the timer if the next deadline moved earlier
+    if reminder_heap and (earliest is None or reminder_heap[0][0] < earliest):
+        reminder_wakeup.set()
+
+def rebuild_reminders():
+    """Rebuild the whole schedule from event_starts: O(n log n)"""
+    now = time.time()
+    reminder_generations.clear()
+    reminder_generations.update((message_id, next(reminder_seq)) for message_id in event_starts)
+    reminder_heap[:] = [
+        (start_ts - offset, next(reminder_seq), message_id, offset, start_ts, reminder_generations[message_id])
+        for message_id, start_ts in event_starts.items()
+        for offset in REMINDER_OFFSETS
+        if start_ts - offset > now
+    ]
+    heapq.heapify(reminder_heap)
+    reminder_wakeup.set()
+
+
+async def setup(bot):
+    # A reload may have changed how emojis are classified: recount aggregates
+    for message_id in set(reaction_signups) | set(reaction_counts):
+        rebuild_attendance(message_id)
+    # ...and heap entries pushed by older code may have a different layout
+    rebuild_reminders()
@@ -0,0 +1,73 @@
+import os
+
+# Deployment settings, read once at startup. Changing any of these needs a
+# restart; code that is safe to swap at runtime lives in the cogs/ extensions.
+
+# "lean" subscribes only to what a reaction tracker uses and drops the message
+# cache; "default" keeps discord.py's default intents and caches.
+BOT_PROFILE = os.environ.get("BOT_PROFILE", "lean")
+
+MONITOR_CHANNEL_ID = 1384853874967449640  # Where reactions happen
+LOG_CHANNEL_ID = 1384854378820800675      # Where logs & threads go
+
+# Number of rendering worker processes (0 = everything on the gateway loop)
+WORKER_PROCESSES = int(os.environ.get("WORKER_PROCESSES", "0"))
+
+# Drift reconciler cadence: tightens after a repair, backs off while clean
+RECONCILE_MIN_SECONDS = 60
+RECONCILE_MAX_SECONDS = 900
+RECONCILE_PACING_SECONDS = 1  # Pause between events so live traffic goes first
+RECONCILE_ACTIVE_SECONDS = 86400  # Events started or changed longer ago than this are left alone
+
+# Reminders before each event start, e.g. "24h,1h" (units: d, h, m)
+REMINDER_OFFSETS = sorted({
+    int(offset[:-1]) * {"d": 86400, "h": 3600, "m": 60}[offset[-1]]
+    for offset in (part.strip().lower() for part in os.environ.get("REMINDER_OFFSETS", "24h,1h").split(","))
+    if offset and offset[-1] in "dhm" and offset[:-1].isdigit()
+}, reverse=True)
+REMINDER_CHANNEL_ID = int(os.environ.get("REMINDER_CHANNEL_ID", MONITOR_CHANNEL_ID))
+
+# Bulk re-render pipeline: concurrent summary edits and progress cadence
+BULK_RENDER_CONCURRENCY = 4
+BULK_PROGRESS_SECONDS = 3
+
+# Full-history backfill: archive/checkpoint directory, messages held per page
+# and the pause between messages so live traffic goes first
+BACKFILL_DIR = os.environ.get("BACKFILL_DIR", "backfill")
+BACKFILL_PAGE_SIZE = 100
+BACKFILL_PACING_SECONDS = 0.5
+ARCHIVE_FLUSH_SECONDS = 5  # Live changes reach the archive in batches this often
+
+# Summary layout: "events" posts one summary message per event; "board" keeps
+# a few pinned messages of up to 10 embeds covering every upcoming event
+SUMMARY_MODE = os.environ.get("SUMMARY_MODE", "events")
+BOARD_MAX_PAGES = int(os.environ.get("BOARD_MAX_PAGES", "3"))
+BOARD_FLUSH_SECONDS = 2  # Changes arriving within this window share one edit
+
+# Shadow verification: share of summary renders re-derived from raw sign-ups
+# and compared with the incremental aggregates (0 disables), and share of those
+# also compared with a fresh fetch of the event message's reactions
+SHADOW_SAMPLE_RATE = float(os.environ.get("SHADOW_SAMPLE_RATE", "0"))
+SHADOW_FETCH_RATE = float(os.environ.get("SHADOW_FETCH_RATE", "0"))
+
+# Reaction change log behind !history: one local segment per UTC day, gzipped
+# once the day is over. THREAD_LOG_MODE "lines" posts every change to the log
+# thread as it happens; "digest" posts one summary per event per digest window
+CHANGE_LOG_DIR = os.environ.get("CHANGE_LOG_DIR", "changelog")
+THREAD_LOG_MODE = os.environ.get("THREAD_LOG_MODE", "lines")
+THREAD_DIGEST_SECONDS = int(os.environ.get("THREAD_DIGEST_SECONDS", "300"))
+HISTORY_LIMIT = 25  # Changes shown per !history lookup
+
+# Categories served straight from reaction counts instead of a full roster
+COUNT_ONLY_CATEGORIES = {
+    name.strip() for name in os.environ.get("COUNT_ONLY_CATEGORIES", "Not attending").split(",") if name.strip()
+}
+
+# Roles shown in the attendance breakdown (empty = every non-managed role)
+BREAKDOWN_ROLE_IDS = {
+    int(role_id) for role_id in os.environ.get("BREAKDOWN_ROLE_IDS", "").split(",") if role_id.strip()
+}
+
+# Extensions in load order: each may import the ones before it, and
+# !reload <name> reloads the named one plus everything after it
+EXTENSIONS = ("cogs.tracking", "cogs.render", "cogs.gateway", "cogs.commands")
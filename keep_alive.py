@@ -1,13 +1,70 @@
-from flask import Flask
-from threading import Thread
+from flask import Flask, Response, jsonify, request
+from threading import Thread, Lock
+import json
 import os
+import secrets
 
 app = Flask("")
 
+# Read-only attendance snapshots published by the bot's event loop.
+# Each entry is replaced wholesale, never mutated, so request threads can
+# read it without touching live bot state or Discord.
+attendance = {}
+_list_version = 0
+_lock = Lock()
+
+# Versions restart at 1 with the process, so ETags also carry a per-boot
+# nonce: a tag from before a restart never matches different content
+_boot = secrets.token_hex(4)
+
+def publish_event(message_id, payload):
+    """Store a fresh attendance snapshot for one event"""
+    global _list_version
+    with _lock:
+        previous = attendance.get(message_id)
+        if previous and all(previous.get(key) == value for key, value in payload.items()):
+            return  # Unchanged: keep the ETag so pollers keep getting 304s
+        version = previous["version"] + 1 if previous else 1
+        attendance[message_id] = dict(payload, version=version)
+        _list_version += 1
+
+def drop_event(message_id):
+    """Forget an event that no longer exists"""
+    global _list_version
+    with _lock:
+        if attendance.pop(message_id, None) is not None:
+            _list_version += 1
+
+def _conditional_json(etag, build):
+    if request.if_none_match.contains_weak(etag):
+        return Response(status=304, headers={"ETag": f'W/"{etag}"'})
+    response = Response(json.dumps(build()), mimetype="application/json")
+    response.set_etag(etag, weak=True)
+    return response
+
 @app.route("/")
 def home():
     return "I am alive!"
 
+@app.route("/events")
+def list_events():
+    with _lock:
+        version = _list_version
+        events = list(attendance.values())
+
+    def build():
+        ordered = sorted(events, key=lambda e: int(e["message_id"]), reverse=True)
+        return {"events": [{key: value for key, value in e.items() if key != "reactions"} for e in ordered]}
+
+    return _conditional_json(f"events-{_boot}-{version}", build)
+
+@app.route("/events/<int:message_id>")
+def get_event(message_id):
+    event = attendance.get(message_id)
+    if event is None:
+        return jsonify({"error": "unknown event"}), 404
+    return _conditional_json(f"{message_id}-{_boot}-{event['version']}", lambda: event)
+
 def run():
     port = int(os.environ.get("PORT", 8080))
     app.run(host="0.0.0.0", port=port)
@@ -0,0 +1,93 @@
+import asyncio
+import time
+
+import discord
+
+from bot_log import fields, logger
+
+# Resolves reacting users that miss the member cache. Misses arriving within
+# a short window are batched into one gateway member request (up to 100 ids
+# per chunk) instead of one REST fetch_user per user, and results are kept
+# for a TTL.
+
+RESOLVER_TTL_SECONDS = 600
+RESOLVER_BATCH_WINDOW = 0.05
+QUERY_CHUNK_SIZE = 100  # Discord's limit for user_ids in a member request
+
+
+class MemberResolver:
+    def __init__(self, bot, ttl=RESOLVER_TTL_SECONDS, window=RESOLVER_BATCH_WINDOW):
+        self.bot = bot
+        self.ttl = ttl
+        self.window = window
+        self._cache = {}    # (guild_id, user_id) -> (expires_at, member or user)
+        self._pending = {}  # guild_id -> {user_id: future}
+
+    def __len__(self):
+        return len(self._cache)
+
+    async def resolve(self, guild, user_id):
+        """Get a member (or user, if they left) with batched, cached lookups"""
+        member = guild.get_member(user_id)
+        if member is not None:
+            return member
+
+        key = (guild.id, user_id)
+        hit = self._cache.get(key)
+        if hit and hit[0] > time.monotonic():
+            return hit[1]
+
+        pending = self._pending.get(guild.id)
+        if pending is None:
+            pending = self._pending[guild.id] = {}
+            asyncio.get_running_loop().create_task(self._flush(guild))
+
+        future = pending.get(user_id)
+        if future is None:
+            future = pending[user_id] = asyncio.get_running_loop().create_future()
+        return await asyncio.shield(future)
+
+    def forget(self, guild_id, user_id):
+        """Drop a cached entry (e.g. after a member update)"""
+        self._cache.pop((guild_id, user_id), None)
+
+    async def _flush(self, guild):
+        await asyncio.sleep(self.window)
+        pending = self._pending.pop(guild.id, {})
+        user_ids = list(pending)
+
+        found = {}
+        for start in range(0, len(user_ids), QUERY_CHUNK_SIZE):
+            chunk = user_ids[start:start + QUERY_CHUNK_SIZE]
+            try:
+                members = await guild.query_members(user_ids=chunk, limit=len(chunk), cache=False)  # Default limit is 5
+                found.update((member.id, member) for member in members)
+            except Exception as e:
+                logger.warning("Member query for %d id(s) failed: %s", len(chunk), e, extra=fields(stage="resolver"))
+
+        logger.debug(
+            "Resolved %d/%d uncached member(s) in one batch", len(found), len(user_ids),
+            extra=fields(stage="resolver", sample=True),
+        )
+
+        expires_at = time.monotonic() + self.ttl
+        for user_id, future in pending.items():
+            member = found.get(user_id)
+            if member is None:
+                # Not in the guild any more: fall back to the user object
+                try:
+                    member = await self.bot.fetch_user(user_id)
+                except discord.HTTPException as e:
+                    if not future.done():
+                        future.set_exception(e)
+                    continue
+            self._cache[(guild.id, user_id)] = (expires_at, member)
+            if not future.done():
+                future.set_result(member)
+
+        self._prune()
+
+    def _prune(self):
+        now = time.monotonic()
+        for key in [key for key, (expires_at, _) in self._cache.items() if expires_at <= now]:
+            del self._cache[key]
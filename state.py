@@ -0,0 +1,129 @@
+import asyncio
+import discord
+from discord.ext import commands
+from collections import defaultdict
+import itertools
+from backfill import BackfillStore
+from bot_log import setup_logging
+from change_log import ChangeLog
+from config import BACKFILL_DIR, BOT_PROFILE, CHANGE_LOG_DIR
+from member_resolver import MemberResolver
+
+# Process-lifetime objects: the bot and every piece of sign-up state.
+# Extensions are reloaded by !reload, this module never is, so state kept here
+# survives a reload. Containers are only ever mutated in place; handles that
+# get reassigned (worker_pool and the *_task slots) are read as state.<name>.
+
+if BOT_PROFILE == "lean":
+    intents = discord.Intents.none()
+    intents.guilds = True           # Channels, threads, roles
+    intents.guild_messages = True   # Commands and message deletes
+    intents.guild_reactions = True
+    intents.message_content = True  # Command text and event titles
+    intents.members = True          # Role breakdown index
+    bot = commands.Bot(
+        command_prefix="!",
+        intents=intents,
+        max_messages=None,              # Raw events only: no message cache
+        chunk_guilds_at_startup=False,  # Only the monitored guild is chunked
+    )
+else:
+    intents = discord.Intents.default()
+    intents.message_content = True
+    intents.reactions = True
+    intents.members = True
+    bot = commands.Bot(command_prefix="!", intents=intents)
+
+member_resolver = MemberResolver(bot)
+
+setup_logging()
+
+# Store sign-ups per emoji per message
+reaction_signups = defaultdict(lambda: defaultdict(set))
+
+# Bare per-emoji counts for count-only categories (no names stored)
+reaction_counts = defaultdict(lambda: defaultdict(int))
+
+# Bot accounts seen per roster reaction (excluded from rosters, included in counts)
+reaction_bot_counts = defaultdict(dict)
+
+# Member -> breakdown role index, kept current by member gateway events
+member_roles = {}
+role_names = {}
+
+# Per event: attending emoji count per user, and attending users per role
+attending_refs = defaultdict(lambda: defaultdict(int))
+user_events = defaultdict(set)
+event_role_counts = defaultdict(lambda: defaultdict(int))
+
+# Per event aggregates kept current on every delta so renders and exports
+# never re-sort or re-count: sorted name lists per emoji, plus late,
+# not-attending and count-only attending totals.
+reaction_rosters = defaultdict(dict)
+event_totals = defaultdict(lambda: defaultdict(int))
+
+# Event board (SUMMARY_MODE=board): pinned page messages, the fingerprint of
+# what each shows, change log lines waiting for the next batch, and the
+# wakeup that coalesces changes into one edit per page
+board_messages = []
+board_fingerprints = []
+board_log = []
+board_wakeup = asyncio.Event()
+board_task = None
+
+# Shadow verification counters: checks run and mismatches per component
+shadow_stats = defaultdict(int)
+
+# Cache summary messages and threads per monitored message. Thread entries
+# are trusted without REST checks: thread delete/update events keep them
+# current, and archived ones are reopened on their next log line.
+summary_messages = {}
+summary_threads = {}
+archived_threads = set()
+
+# Title and formatted start time per monitored message
+event_meta = {}
+
+# Content fingerprint of the last embed/view sent per summary
+summary_fingerprints = {}
+
+# Discord user id per tracked name (for reminder pings)
+user_ids = {}
+
+# Event start (unix seconds) per monitored message, and one min-heap of
+# (fire_at, seq, message_id, offset, start_ts, generation) reminders for all
+# events. Each (re)schedule of an event draws a new generation; entries whose
+# generation or start_ts no longer match are stale and skipped, so an event
+# re-timed back to an earlier start never fires its old entries as well.
+event_starts = {}
+reminder_generations = {}
+reminder_heap = []
+reminder_wakeup = asyncio.Event()
+reminder_task = None
+reminder_seq = itertools.count()
+
+# Rendering workers when running in multi-process mode
+worker_pool = None
+
+# Background drift reconciler, and when each event last saw a live change
+# (only upcoming or recently active events are reconciled)
+reconcile_task = None
+reconcile_wakeup = asyncio.Event()
+event_activity = {}
+
+# History backfill: durable archive, and the events known only from it
+# (neither reconciled nor re-rendered until they see live activity)
+backfill_store = BackfillStore(BACKFILL_DIR)
+historical_events = set()
+backfill_task = None
+
+# Events changed or deleted since the archive was last flushed: the archive
+# loop appends their current record, or a tombstone once they are gone
+archive_dirty = set()
+archive_task = None
+
+# Local reaction change log (!history), and the changes per event waiting
+# for the next thread digest (THREAD_LOG_MODE=digest)
+change_log = ChangeLog(CHANGE_LOG_DIR)
+digest_pending = defaultdict(list)
+digest_task = None
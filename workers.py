@@ -0,0 +1,294 @@
+import asyncio
+import multiprocessing
+import os
+import queue
+import threading
+
+import state
+from bot_log import fields, logger
+from config import LOG_CHANNEL_ID
+
+# Optional multi-process mode: the gateway process only applies reaction
+# deltas and pushes them over IPC queues; worker processes own rendering,
+# summary edits, thread logging and exports via a REST-only login.
+
+HEALTH_CHECK_SECONDS = 5
+
+_ctx = multiprocessing.get_context("spawn")
+
+
+def owner_of(message_id, worker_count):
+    """Pick the worker that owns a monitored message (keeps per-event ordering)"""
+    return message_id % worker_count
+
+
+class WorkerPool:
+    """Gateway-side handle on the worker processes"""
+
+    def __init__(self, count, state):
+        self.count = count
+        self.state = state  # callable(worker_index, dirty) -> snapshot dict
+        self.results = _ctx.Queue()
+        self.jobs = [None] * count
+        self.procs = [None] * count
+        self.pending = [{} for _ in range(count)]  # message id -> newest unacknowledged seq
+        self.lines = [{} for _ in range(count)]    # message id -> [(seq, thread line)] not yet acknowledged
+        self.seq = 0
+        self.on_result = None
+
+    def start(self):
+        for index in range(self.count):
+            self._spawn(index)
+
+    def _spawn(self, index):
+        jobs = _ctx.Queue()
+        proc = _ctx.Process(
+            target=run_worker,
+            args=(index, jobs, self.results),
+            name=f"react-bot-worker-{index}",
+            daemon=True,
+        )
+        proc.start()
+        self.jobs[index] = jobs
+        self.procs[index] = proc
+        # Hand the new worker the authoritative state, re-rendering anything
+        # its predecessor accepted but never confirmed.
+        snapshot = self._snapshot(index, set(self.pending[index]))
+        snapshot["lines"] = {mid: [line for _, line in entries] for mid, entries in self.lines[index].items()}
+        jobs.put_nowait(snapshot)
+        logger.info("Started worker (pid %s)", proc.pid, extra=fields(stage="worker", worker=index))
+
+    def _snapshot(self, index, dirty):
+        # The snapshot reflects every job submitted so far, so it covers their seqs
+        snapshot = self.state(index, dirty)
+        snapshot["seq"] = self.seq
+        return snapshot
+
+    def submit(self, message_id, job):
+        index = owner_of(message_id, self.count)
+        self.seq += 1
+        job["seq"] = self.seq
+        self.pending[index][message_id] = self.seq
+        if job.get("line"):
+            self.lines[index].setdefault(message_id, []).append((self.seq, job["line"]))
+        self.jobs[index].put_nowait(job)
+
+    def submit_any(self, job):
+        """Send a job that is not tied to a message's render ordering"""
+        message_id = job.get("message_id", 0)
+        self.jobs[owner_of(message_id, self.count)].put_nowait(job)
+
+    def broadcast(self, job):
+        """Send a job every worker must apply (e.g. a member's role change)"""
+        for jobs in self.jobs:
+            jobs.put_nowait(job)
+
+    def resync(self):
+        """Push a fresh snapshot to every worker with all of its events dirty"""
+        for index in range(self.count):
+            self.jobs[index].put_nowait(self._snapshot(index, None))
+
+    async def supervise(self):
+        while True:
+            await asyncio.sleep(HEALTH_CHECK_SECONDS)
+            for index, proc in enumerate(self.procs):
+                if proc is not None and not proc.is_alive():
+                    logger.warning("⚠️ Worker exited with code %s, restarting...", proc.exitcode, extra=fields(stage="worker", worker=index))
+                    self._spawn(index)
+
+    def start_result_reader(self, loop):
+        """Read worker results on a daemon thread, so a blocked read never holds up interpreter exit"""
+        def read():
+            while True:
+                loop.call_soon_threadsafe(self._apply_result, self.results.get())
+        threading.Thread(target=read, name="react-bot-worker-results", daemon=True).start()
+
+    def _apply_result(self, result):
+        if result[0] == "done":
+            _, index, handled = result
+            pending = self.pending[index]
+            lines = self.lines[index]
+            for message_id, seq in handled.items():
+                # Only acknowledge up to the job the worker handled: a newer
+                # submit stays pending until a later batch confirms it
+                if pending.get(message_id, seq + 1) <= seq:
+                    del pending[message_id]
+                if message_id in lines:
+                    lines[message_id] = [entry for entry in lines[message_id] if entry[0] > seq]
+                    if not lines[message_id]:
+                        del lines[message_id]
+        elif self.on_result:
+            self.on_result(result)
+
+
+def run_worker(index, jobs, results):
+    """Process entry point for a rendering worker"""
+    try:
+        asyncio.run(_worker_main(index, jobs, results))
+    except KeyboardInterrupt:
+        pass
+
+
+def _drain(jobs, first):
+    batch = [first]
+    while True:
+        try:
+            batch.append(jobs.get_nowait())
+        except queue.Empty:
+            return batch
+
+
+async def _worker_main(index, jobs, results):
+    from cogs import render, tracking  # Imported directly: workers never reload
+
+    bot = state.bot
+    await bot.login(os.environ["BOT_TOKEN"])
+    log_channel = bot.get_partial_messageable(LOG_CHANNEL_ID)
+    loop = asyncio.get_running_loop()
+    logger.info("Worker ready", extra=fields(stage="worker", worker=index))
+
+    failed = {}  # message id -> lines of a render that failed, resent with its next one
+
+    while True:
+        first = await loop.run_in_executor(None, jobs.get)
+        dirty = {}
+        handled = {}  # message id -> newest seq applied in this batch
+        exports = []
+
+        for job in _drain(jobs, first):
+            op = job["op"]
+            if op == "snapshot":
+                _restore_snapshot(tracking, log_channel, job)
+                for message_id in job["dirty"]:
+                    dirty.setdefault(message_id, [])
+                    handled[message_id] = job["seq"]
+                for message_id, lines in job.get("lines", {}).items():
+                    # Lines a dead predecessor may not have sent (at-least-once)
+                    if message_id in dirty:
+                        dirty[message_id].extend(lines)
+            elif op == "delta":
+                message_id = handled_id(handled, job)
+                tracking.update_member_roles(job["user"], frozenset(job["roles"]))
+                tracking.record_reaction(message_id, job["emoji"], job["user"], job["action"])
+                state.event_meta[message_id] = (job["title"], job["timestamp"])
+                lines = dirty.setdefault(message_id, [])
+                if job["line"]:  # None when threads get digests instead
+                    lines.append(job["line"])
+            elif op in ("replace", "load"):
+                # "load" brings in backfilled history without rendering it
+                message_id = handled_id(handled, job) if "seq" in job else job["message_id"]
+                tracking.clear_reactions(message_id)
+                for emoji_key, users in job["signups"].items():
+                    state.reaction_signups[message_id][emoji_key] = set(users)
+                if job["counts"]:
+                    state.reaction_counts[message_id].update(job["counts"])
+                tracking.rebuild_attendance(message_id)
+                state.event_meta[message_id] = (job["title"], job["timestamp"])
+                if op == "replace":
+                    dirty.setdefault(message_id, [])
+            elif op == "evict":
+                # Past history the gateway reads back from its archive on demand
+                tracking.clear_reactions(job["message_id"])
+                state.event_meta.pop(job["message_id"], None)
+            elif op == "forget":
+                message_id = handled_id(handled, job)
+                dirty.pop(message_id, None)
+                tracking.clear_reactions(message_id)
+                state.event_meta.pop(message_id, None)
+                summary_message = state.summary_messages.pop(message_id, None)
+                if summary_message is not None:
+                    state.summary_threads.pop(summary_message.id, None)
+                    await render.mark_summary_deleted(summary_message, job["title"])
+            elif op == "thread_gone":
+                for summary_id, thread in list(state.summary_threads.items()):
+                    if thread.id == job["thread_id"]:
+                        del state.summary_threads[summary_id]
+                state.archived_threads.discard(job["thread_id"])
+            elif op == "thread_archived":
+                if job["archived"]:
+                    state.archived_threads.add(job["thread_id"])
+                else:
+                    state.archived_threads.discard(job["thread_id"])
+            elif op == "member_roles":
+                tracking.update_member_roles(job["user"], frozenset(job["roles"]))
+            elif op == "role_name":
+                if job["name"] is None:
+                    state.role_names.pop(job["role_id"], None)
+                else:
+                    state.role_names[job["role_id"]] = job["name"]
+            elif op == "export":
+                exports.append(job)
+
+        # One render per event per batch, however many deltas arrived
+        for message_id, lines in dirty.items():
+            lines[:0] = failed.pop(message_id, [])
+            try:
+                await _render(render, log_channel, results, message_id, lines)
+            except Exception as e:
+                # Left unacknowledged: the event and its lines stay pending for a replacement worker
+                handled.pop(message_id, None)
+                failed[message_id] = lines
+                logger.exception("Worker failed to render: %s", e, extra=fields(message_id=message_id, stage="render", worker=index))
+
+        for job in exports:
+            try:
+                channel = bot.get_partial_messageable(job["channel_id"])
+                export_text = render.build_export_text(job["message_id"], job["title"], job["timestamp"], job["author"])
+                await render.send_export(channel, export_text, job["title"])
+            except Exception as e:
+                logger.exception("Worker failed export: %s", e, extra=fields(message_id=job["message_id"], stage="export", worker=index))
+
+        results.put(("done", index, handled))
+
+
+def handled_id(handled, job):
+    """Note a submitted job's seq for the batch acknowledgement; returns its message id"""
+    handled[job["message_id"]] = max(handled.get(job["message_id"], 0), job["seq"])
+    return job["message_id"]
+
+
+def _restore_snapshot(tracking, log_channel, job):
+    tracking.clear_all_reactions()
+    state.member_roles.clear()
+    state.member_roles.update(job["member_roles"])
+    state.role_names.clear()
+    state.role_names.update(job["role_names"])
+    for message_id, emojis in job["signups"].items():
+        for emoji_key, users in emojis.items():
+            state.reaction_signups[message_id][emoji_key] = set(users)
+    for message_id, counts in job["counts"].items():
+        if counts:
+            state.reaction_counts[message_id].update(counts)
+    for message_id in set(job["signups"]) | set(job["counts"]):
+        tracking.rebuild_attendance(message_id)
+    state.event_meta.clear()
+    state.event_meta.update(job["meta"])
+    state.summary_messages.clear()
+    for message_id, summary_id in job["summaries"].items():
+        state.summary_messages[message_id] = log_channel.get_partial_message(summary_id)
+    state.summary_threads.clear()
+    for summary_id, thread_id in job["threads"].items():
+        state.summary_threads[summary_id] = state.bot.get_partial_messageable(thread_id)
+    state.archived_threads.clear()
+    state.archived_threads.update(job["archived"])
+
+
+async def _render(render, log_channel, results, message_id, lines):
+    title, timestamp_str = state.event_meta.get(message_id, ("Sign-Ups", ""))
+    previous = state.summary_messages.get(message_id)
+    await render.post_or_edit_summary(log_channel, message_id, title, timestamp_str)
+
+    summary_message = state.summary_messages.get(message_id)
+    if summary_message is None:
+        return
+    if previous is None or previous.id != summary_message.id:
+        results.put(("summary", message_id, summary_message.id))
+
+    if not lines:
+        return
+
+    previous_thread = state.summary_threads.get(summary_message.id)
+    thread = await render.send_thread_lines(summary_message, message_id, title, lines)
+    if thread is not previous_thread:
+        results.put(("thread", summary_message.id, thread.id))
+